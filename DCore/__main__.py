@@ -2,16 +2,42 @@
 # https://github.com/OnurYilmazGit/-Paper-Module-RaspberryPi-Services-Fork-
 
 from DCore.display_config import DISPLAY_SETTINGS
+from DCore.inputs import create_input
+from DCore.tricolor import split_tricolor, DEFAULT_THRESHOLDS
+from DCore.pipeline import ScreenPipeline
+from DCore.worker import ScreenWorker
+from DCore.frame_store import DerivedFrameCache
+from DCore.watcher import watch_file
+from DCore.virtual import VirtualDisplay, VIRTUAL_KEYS
+from DCore.pixels import spi_transfer_size, spi_bus_speed
+from DCore.buffers import reuse_pil_blocks
+from DCore.offload import TransformPool
+from DCore.metrics import MetricsExporter, render_prometheus, read_stats, DEFAULT_SOCKET
 import yaml
 from importlib import import_module
 from PIL import Image
-from threading import Thread
+from threading import Thread, Event, Lock
+from concurrent.futures import ThreadPoolExecutor
 import time
-#import RPi.GPIO as GPIO
-from gpiozero import LED
 import DCore.log as Log
 import sys
 
+_EPD_INIT_LOCK = Lock()
+# Screen config keys read by the worker, changing them needs no new pipeline.
+WORKER_KEYS = ("default_input", "pacing")
+
+
+def _input_order(frame_inputs):
+    """Yield frame_inputs entries with layouts after the inputs they can place."""
+    items = list(frame_inputs.items())
+    yield from ((name, config) for name, config in items if config.get("type") != "layout")
+    yield from ((name, config) for name, config in items if config.get("type") == "layout")
+
+
+def _without_worker_keys(screen_config):
+    return {key: value for key, value in screen_config.items() if key not in WORKER_KEYS}
+
+
 class DisplayManager:
     def __init__(self, config_file):
         self.default_pins = {
@@ -24,9 +50,24 @@ class DisplayManager:
             "sck": 11,
             "backlight": None,
         }
+        self.config_file = config_file
         self.config = self.load_config(config_file)
+        Log.setup(self.config.get("logging"))
+        self.pipelines = {}
+        self.last_versions = {}
+        self.derived_frames = DerivedFrameCache()
+        self.workers = {}
+        self.stop_event = Event()
+        self.running = False
+        self._reload_lock = Lock()
+        # Screens whose driver payload another screen with the same frame reuses.
+        self._shared_screens = set()
+        # Worker processes running the transforms, while the cycle runs with offload enabled.
+        self.offload = None
+        reuse_pil_blocks(len(self.config["screens"]), (self.config.get("memory") or {}).get("pil_cache_bytes"))
         self.screens = self.init_screens()
         self.inputs = self.init_inputs()
+        self._register_consumers()
         
 
     def load_config(self, config_file):
@@ -37,28 +78,254 @@ class DisplayManager:
     def init_inputs(self):
         """Initialize input sources for frames."""
         inputs = {}
-        for input_name, input_config in self.config["frame_inputs"].items():
-            inputs[input_name] = input_config["path"]
+        for input_name, input_config in _input_order(self.config["frame_inputs"]):
+            inputs[input_name] = create_input(input_name, input_config, inputs)
         return inputs
 
     def init_screens(self):
-        """Initialize multiple displays based on the configuration."""
+        """Initialize multiple displays based on the configuration.
+
+        Panels are initialized concurrently, so startup takes as long as the
+        slowest one instead of the sum of all their resets and clears.
+        """
+        startup = self.config.get("startup") or {}
+        clear = not startup.get("first_frame_asap", False)
+        screen_settings = self._screen_settings(self.config["screens"])
+
+        def init_screen(screen_name):
+            settings = screen_settings[screen_name]
+            start = time.perf_counter()
+            display = self.init_display(settings, clear)
+            pipeline = ScreenPipeline(screen_name, self.config["screens"][screen_name], settings, display)
+            Log.log_event(f"Screen '{screen_name}' ready in {time.perf_counter() - start:.2f}s")
+            return display, pipeline
+
+        workers = len(screen_settings) if startup.get("parallel", True) else 1
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="DCore-init") as pool:
+            results = dict(zip(screen_settings, pool.map(init_screen, screen_settings)))
         screens = {}
-        for screen_name, screen_config in self.config["screens"].items():
+        for screen_name, (display, pipeline) in results.items():
+            screens[screen_name] = display
+            self.pipelines[screen_name] = pipeline
+        return screens
+
+    def _screen_settings(self, screens):
+        """Return the DISPLAY_SETTINGS entry of every configured screen."""
+        screen_settings = {}
+        for screen_name, screen_config in screens.items():
             display_name = screen_config["name"]
             settings = DISPLAY_SETTINGS.get(display_name)
             if not settings:
                 raise ValueError(f"Unsupported display: {display_name}")
-            screens[screen_name] = self.init_display(settings)
-        return screens
+            if settings["driver"] == "virtual":
+                settings = dict(settings, **{key: screen_config[key]
+                                             for key in VIRTUAL_KEYS if key in screen_config})
+                # One frame ring per screen, several shm screens must not share one.
+                settings.setdefault("shm_name", f"dcore_{screen_name}")
+            screen_settings[screen_name] = settings
+        return screen_settings
+
+    def reload_config(self):
+        """Apply changes of the config file without touching what did not change.
+
+        Inputs are recreated only when their own section changed. Screens
+        keep their driver object as long as they show the same panel with
+        the same settings; a
+        changed screen section rebuilds just its pipeline, and a new
+        default_input or pacing just restarts its worker. Returns False
+        when the new config is invalid and the running one was kept.
+        """
+        with self._reload_lock:
+            try:
+                config = self.load_config(self.config_file)
+                new_screens = config["screens"]
+                new_inputs = config["frame_inputs"]
+                screen_settings = self._screen_settings(new_screens)
+            except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError) as e:
+                Log.log_error(f"Config reload failed, keeping the running config: {e}")
+                return False
+            old_screens = self.config["screens"]
+            old_inputs = self.config["frame_inputs"]
+
+            inputs = {}
+            stale_inputs = []
+            try:
+                for input_name, input_config in _input_order(new_inputs):
+                    current = self.inputs.get(input_name)
+                    # A layout is rebuilt as well when one of its tile inputs was.
+                    tiles_kept = all(inputs.get(tile["input"]) is self.inputs.get(tile["input"])
+                                     for tile in input_config.get("tiles", ()))
+                    if current is not None and old_inputs.get(input_name) == input_config and tiles_kept:
+                        inputs[input_name] = current
+                        continue
+                    inputs[input_name] = create_input(input_name, input_config, inputs)
+                    if current is not None:
+                        stale_inputs.append(current)
+            except (OSError, ValueError) as e:
+                for input_name, frame_input in inputs.items():
+                    if frame_input is not self.inputs.get(input_name):
+                        frame_input.close()
+                Log.log_error(f"Config reload failed, keeping the running config: {e}")
+                return False
+            stale_inputs += [i for name, i in self.inputs.items() if name not in new_inputs]
+            inputs_changed = len(stale_inputs) + sum(
+                1 for name, frame_input in inputs.items() if name not in self.inputs)
+
+            # Screens whose worker has to stop: removed, rebuilt or switched input.
+            changed = {}
+            for screen_name, old_config in old_screens.items():
+                new_config = new_screens.get(screen_name)
+                input_name = old_config.get("default_input")
+                if (new_config != old_config
+                        or self.inputs.get(input_name) is not inputs.get(input_name)):
+                    changed[screen_name] = new_config
+            for screen_name in changed:
+                self._stop_worker(screen_name)
+                if screen_name in self.pipelines:
+                    self.pipelines[screen_name].flush()
+
+            # Build every new driver and pipeline before committing anything,
+            # so a value YAML accepted but DCore does not leaves the old setup.
+            built = {}
+            rebuilt = []  # screens getting a new driver, including one that failed
+            try:
+                for screen_name, screen_config in new_screens.items():
+                    old_config = old_screens.get(screen_name)
+                    if old_config is None:
+                        keep_display = False
+                    elif screen_name not in changed or (
+                            _without_worker_keys(screen_config) == _without_worker_keys(old_config)):
+                        continue
+                    else:
+                        # Same panel with the same resolved settings (virtual
+                        # screens override size, mode and output per screen).
+                        keep_display = self.pipelines[screen_name].settings == screen_settings[screen_name]
+                    if not keep_display:
+                        rebuilt.append(screen_name)
+                    built[screen_name] = self._build_screen(
+                        screen_name, screen_config, screen_settings[screen_name], keep_display)
+            except Exception as e:
+                self._discard_built(built, rebuilt)
+                for input_name, frame_input in inputs.items():
+                    if frame_input is not self.inputs.get(input_name):
+                        frame_input.close()
+                if self.running:
+                    for screen_name in changed:
+                        self._start_worker(screen_name)
+                Log.log_error(f"Config reload failed, keeping the running config: {e!r}")
+                return False
+
+            self.config = config
+            self.inputs = inputs
+            for screen_name, new_config in changed.items():
+                if new_config is None:
+                    self.pipelines.pop(screen_name).close()
+                    self._release_display(self.screens.pop(screen_name))
+                    if self.offload is not None:
+                        self.offload.release(screen_name)
+                    Log.log_event(f"Screen '{screen_name}' removed")
+                # A recreated input starts over at version 1: drop the derived
+                # frame held under the old input's key, or it would be reused.
+                self.derived_frames.release(screen_name)
+                self.last_versions.pop(screen_name, None)
+            for screen_name, (display, pipeline, keep_display) in built.items():
+                old_pipeline = self.pipelines.get(screen_name)
+                if old_pipeline is not None:
+                    old_pipeline.close()
+                    if not keep_display:
+                        self._release_display(self.screens[screen_name])
+                self.screens[screen_name] = display
+                self.pipelines[screen_name] = pipeline
+                changed[screen_name] = new_screens[screen_name]
+                Log.log_event(f"Screen '{screen_name}' rebuilt" + (" with its running driver" if keep_display else ""))
+            if self.running:
+                for screen_name, screen_config in changed.items():
+                    if screen_config is not None:
+                        self._start_worker(screen_name)
+            self._register_consumers()
+            for frame_input in stale_inputs:
+                frame_input.close()
+            Log.log_event(f"Config reloaded: {len(changed)} screen(s) and {inputs_changed} input(s) changed")
+            return True
+
+    def _register_consumers(self):
+        """Let every input know the transforms of the screens showing it.
+
+        Also finds the screens that can share a driver payload; the others
+        prepare theirs in their own reused buffers.
+        """
+        consumers = {name: {} for name in self.inputs}
+        payload_groups = {}
+        for screen_name, pipeline in self.pipelines.items():
+            input_name = self.config["screens"][screen_name].get("default_input")
+            if input_name in consumers:
+                consumers[input_name][pipeline.key] = (
+                    pipeline.input_mode, pipeline.transform, pipeline.source_size)
+            if pipeline.share_key is not None:
+                group = (input_name, pipeline.key, pipeline.share_key)
+                payload_groups.setdefault(group, []).append(screen_name)
+        for layout_name, input_config in self.config["frame_inputs"].items():
+            for tile in input_config.get("tiles", ()):
+                # Layouts crop their tiles in source pixels: no reduced decoding.
+                if tile["input"] in consumers:
+                    consumers[tile["input"]][("layout", layout_name)] = (input_config.get("mode", "RGB"), None, None)
+        for input_name, frame_input in self.inputs.items():
+            frame_input.set_consumers(consumers[input_name])
+        self._shared_screens = {name for names in payload_groups.values() if len(names) > 1 for name in names}
+
+    def _build_screen(self, screen_name, screen_config, settings, keep_display):
+        """Return (display, pipeline, keep_display) of a new or changed screen.
+
+        The running driver is reused when keep_display is set; nothing of
+        the running screen is touched, reload_config swaps them in.
+        """
+        if keep_display:
+            display = self.screens[screen_name]
+        else:
+            startup = self.config.get("startup") or {}
+            display = self.init_display(settings, not startup.get("first_frame_asap", False))
+        try:
+            pipeline = ScreenPipeline(screen_name, screen_config, settings, display)
+        except Exception:
+            if not keep_display:
+                self._release_display(display)
+            raise
+        return display, pipeline, keep_display
+
+    def _discard_built(self, built, rebuilt):
+        """Undo the _build_screen calls of a reload that failed."""
+        for display, pipeline, keep_display in built.values():
+            if not keep_display:
+                self._release_display(display)
+        for screen_name in rebuilt:
+            old_display = self.screens.get(screen_name)
+            if isinstance(old_display, VirtualDisplay):
+                # A new display on the same path or ring may have resized
+                # the old output: open it again as it was.
+                old_pipeline = self.pipelines[screen_name]
+                old_pipeline.close()
+                self._release_display(old_display)
+                display = VirtualDisplay.from_settings(old_pipeline.settings)
+                self.screens[screen_name] = display
+                self.pipelines[screen_name] = ScreenPipeline(
+                    screen_name, self.config["screens"][screen_name], old_pipeline.settings, display)
+
+    def _release_display(self, display):
+        """Free what a display that is no longer configured holds."""
+        # Hardware drivers are left as they are, so the panel keeps its image.
+        if isinstance(display, VirtualDisplay):
+            display.cleanup()
 
-    def set_backlight(pin=24, enable=True):
+    def set_backlight(self, pin=24, enable=True, blink=True):
+        # gpiozero is only needed by screens with a backlight pin
+        from gpiozero import LED
         # Initialize the backlight control as an LED object
         backlight = LED(pin)
     
         # Turn off the backlight briefly (LOW)
-        backlight.off()
-        sleep(0.1)
+        if blink:
+            backlight.off()
+            time.sleep(0.1)
     
         # Set the backlight state based on `enable`
         if enable:
@@ -66,8 +333,12 @@ class DisplayManager:
         else:
             backlight.off()
 
-    def init_display(self, settings):
-        """Initialize a single display based on the provided settings."""
+    def init_display(self, settings, clear=True):
+        """Initialize a single display based on the provided settings.
+
+        With clear=False the panel is not blanked first; the first frame
+        overwrites it anyway (startup first_frame_asap).
+        """
         driver_module = settings["driver"]
         driver_class = settings["class"]
         pins = self.default_pins
@@ -82,25 +353,29 @@ class DisplayManager:
         inverse = settings.get("inverse", False)
         invert = settings.get("invert", False)
         if driver_module == "waveshare_epd":
-            epd_module = import_module(f"waveshare_epd.{driver_class}")
-            epd = epd_module.EPD()
-            if hasattr(epd, 'FULL_UPDATE'):
-                epd.init(epd.FULL_UPDATE)
-                epd.Clear(0xff)
-                epd.init(epd.PART_UPDATE)
-                print(dir(epd))
-                print(type(epd))
-            else:
-                epd.init()
-                if hasattr(epd, "smart_update"):
-                    print("Smart update")
-                    sys.stdout.flush()
-                    image = Image.new('1', (epd.width, epd.height), 255)
-                    epd.smart_update(image)
-                if hasattr(epd, "Clear"):
-                    epd.Clear(0xff)
-            sys.stdout.flush()
+            # The waveshare drivers share one module level epdconfig, so
+            # panels are brought up one at a time even with parallel init.
+            with _EPD_INIT_LOCK:
+                epd_module = import_module(f"waveshare_epd.{driver_class}")
+                epd = epd_module.EPD()
+                if hasattr(epd, 'FULL_UPDATE'):
+                    if clear:
+                        epd.init(epd.FULL_UPDATE)
+                        epd.Clear(0xff)
+                        epd.init(epd.PART_UPDATE)
+                    # Otherwise the first (full) refresh initializes the panel.
+                    Log.log_event(f"{driver_class} initialized for partial updates")
+                else:
+                    epd.init()
+                    if hasattr(epd, "smart_update") and clear:
+                        Log.log_event(f"{driver_class} initialized with smart update")
+                        image = Image.new('1', (epd.width, epd.height), 255)
+                        epd.smart_update(image)
+                    if hasattr(epd, "Clear") and clear:
+                        epd.Clear(0xff)
             return epd
+        elif driver_module == "virtual":
+            return VirtualDisplay.from_settings(settings)
         elif driver_module.startswith("luma."):
             luma_device = import_module(f"{driver_module}.device")
             serial_interface = self.init_serial_interface(settings)
@@ -110,7 +385,7 @@ class DisplayManager:
                 bgr=bgr, inverse=inverse, invert=invert)
             
             if pins.get("backlight", 24):
-                self.set_backlight(pins.get("backlight", 24))
+                self.set_backlight(pins.get("backlight", 24), blink=clear)
             
             #if settings.get("bgr", False):
             #    display.command(0x36, 0x40)  # Set the BGR mode
@@ -122,7 +397,7 @@ class DisplayManager:
 
     def init_serial_interface(self, settings):
         """Initialize SPI or I2C serial interface based on display settings."""
-        print(f"Settings: {settings}")
+        Log.log_event(f"Settings: {settings}")
         interface = settings["interface"]
         port = settings.get("port", 0)
         if interface == "i2c":
@@ -135,9 +410,10 @@ class DisplayManager:
             dc = pins.get("dc", 25)
             device = settings.get("spi_device", 0)
             rst = pins.get("reset", 27)
-            speed = settings.get("spi_speed_hz", 8000000)
+            speed = spi_bus_speed(settings.get("spi_speed_hz", 8000000))
             Log.log_event(f"Using SPI interface with pins: port={port}, dc={dc}, device={device}, rst={rst}, speed={speed}")
-            return spi(port=port, device=device, gpio_DC=dc, gpio_RST=rst, spi_speed_hz=speed)
+            return spi(port=port, device=device, gpio_DC=dc, gpio_RST=rst, bus_speed_hz=speed,
+                       transfer_size=spi_transfer_size())
         else:
             raise ValueError(f"Unsupported interface: {interface}")
 
@@ -148,173 +424,218 @@ class DisplayManager:
             if display:
                 self._clear_display(display)
             else:
-                print(f"Screen '{screen_name}' not found.")
+                Log.log_warning(f"Screen '{screen_name}' not found.")
         else:
             for display in self.screens.values():
                 self._clear_display(display)
 
     def _clear_display(self, display):
         """Helper to clear a specific display."""
+        # Let a frame still being written finish before the bus is reused.
+        for pipeline in self.pipelines.values():
+            if pipeline.display is display:
+                if pipeline.clear():
+                    return
+                pipeline.flush()
         if hasattr(display, "Clear"):  # For Waveshare EPD
             display.Clear(0xff)
         elif hasattr(display, "clear"):  # For Luma OLED/LCD
             display.clear()
         else:
-            print("Warning: Clear method not supported for this display.")
+            Log.log_warning("Clear method not supported for this display.")
 
-    def tricolor(self, image, save_path="/home/pi"):
-        # Convert the image to grayscale
-        grayscale = image.convert('L')
+    def tricolor(self, image, thresholds=DEFAULT_THRESHOLDS):
+        """Split an image into the black and red planes of a tri-color e-paper."""
+        return split_tricolor(image, thresholds)
 
-        # Create black-and-white image (black for dark, white for light or mid-tones)
-        img_bw = Image.new('1', image.size, color=255)  # Start with white
-        bw_pixels = img_bw.load()
 
-        # Create red-and-white image (red for mid-tones, white for others)
-        img_rw = Image.new('RGB', image.size, color=(255, 255, 255))  # Start with white
-        rw_pixels = img_rw.load()
+    def show_image(self, image, screen_name):
+        """Display an image on the specified screen."""
+        pipeline = self.pipelines.get(screen_name)
+        if not pipeline:
+            Log.log_warning(f"Screen '{screen_name}' not found.")
+            return
+        pipeline.push(pipeline.transform(image))
 
-        for y in range(image.size[1]):
-            for x in range(image.size[0]):
-                gray_pixel = grayscale.getpixel((x, y))
+    def transform_frame(self, image, screen_name):
+        """Flip, rotate, resize and convert a source image for a screen."""
+        return self.pipelines[screen_name].transform(image)
 
-                # Set red-and-white pixel
-                if 85 <= gray_pixel <= 170:  # Middle gray range becomes red
-                    rw_pixels[x, y] = 0
-                    bw_pixels[x, y] = 255  # Ensure corresponding part is white in black-and-white
-                elif gray_pixel < 85:  # Dark areas become black
-                    bw_pixels[x, y] = 0  # Black in black-and-white
-                else:  # Light areas
-                    bw_pixels[x, y] = 255  # White in black-and-white
+    def push_frame(self, frame, screen_name):
+        """Send a frame already transformed by transform_frame to its screen."""
+        return self.pipelines[screen_name].push(frame)
 
-        # Save black-and-white image
-        #img_bw_path = f"{save_path}/output_black_and_white.png"
-        #img_bw.save(img_bw_path)
+    def update_screen(self, screen_name):
+        """Push the newest frame of a screen's input if it has not been shown yet.
 
-        # Save red-and-white image
-        #img_rw_path = f"{save_path}/output_red_and_white.png"
-        #img_rw.save(img_rw_path)
+        Returns True when a frame was sent, False when nothing new or changed was found.
+        """
+        pipeline = self.pipelines[screen_name]
+        frame_input = self._screen_input(screen_name)
+        if not frame_input:
+            return False
+        start = time.perf_counter()
+        frame_input.poll()
+        version, current_image = frame_input.snapshot(pipeline.input_mode)
+        # Only push when the input produced a frame this screen has not shown yet.
+        if current_image is None or version == self.last_versions.get(screen_name):
+            return False
+        # E-papers wait for bursts of changes to settle and for their minimum
+        # refresh interval; the newest frame is taken once they are due.
+        if pipeline.refresher is not None and not pipeline.refresher.due():
+            return False
+        pipeline.metrics.record("decode", time.perf_counter() - start)
+        # Screens needing the same transform of the same input version share it.
+        key = (frame_input.name, version) + pipeline.key
+        misses = pipeline.metrics.cache_misses
+        # Inputs decoding ahead may have transformed the frame already.
+        prepared = frame_input.transformed(version, pipeline.key)
+        frame = self.derived_frames.acquire(
+            screen_name, key, lambda: prepared or pipeline.timed_transform(current_image, self.offload))
+        if pipeline.metrics.cache_misses == misses:
+            pipeline.metrics.cache_hits += 1
+        shared = None
+        if screen_name in self._shared_screens:
+            shared = lambda name, build: self.derived_frames.extra(screen_name, name, build)
+        pushed = pipeline.push(frame, shared)
+        self.last_versions[screen_name] = version
+        return pushed
 
-        # Return the images for further processing if needed
-        return img_bw, img_rw
+    def _screen_input(self, screen_name):
+        """Return the frame input a screen shows, or None if misconfigured."""
+        input_name = self.config["screens"][screen_name].get("default_input")
+        if not input_name:
+            Log.log_warning(f"No default_input defined for screen '{screen_name}'")
+            return None
+        frame_input = self.inputs.get(input_name)
+        if not frame_input:
+            Log.log_warning(f"Input '{input_name}' not found in frame_inputs for screen '{screen_name}'")
+        return frame_input
 
+    def wait_for_input(self, screen_name, stop_event):
+        """Block until a screen's input has a frame the screen has not shown."""
+        frame_input = self._screen_input(screen_name)
+        if not frame_input:
+            stop_event.wait(ScreenWorker.ERROR_BACKOFF)
+            return False
+        return frame_input.wait_for_change(self.last_versions.get(screen_name), stop_event)
 
-    def show_image(self, image, screen_name):
-        """Display an image on the specified screen."""
-        display = self.screens.get(screen_name)
-        if not display:
-            print(f"Screen '{screen_name}' not found.")
-            return
-        display_name = self.config["screens"][screen_name]["name"]
-        settings = DISPLAY_SETTINGS.get(display_name, {})
-        width = settings.get("width", image.width)
-        height = settings.get("height", image.height)
-        target_mode = settings.get("mode", "RGB")
-        epd = display.__class__.__name__.startswith("EPD")
-        if settings.get("inverse", False):
-            image = image.transpose(Image.FLIP_LEFT_RIGHT)
-        if epd:
-            rotate = settings.get("rotate", 0)
-            if rotate == 1:
-                image = image.rotate(90, expand=True)
-            elif rotate == 2:
-                image = image.rotate(180, expand=True)
-            elif rotate == 3:
-                image = image.rotate(270, expand=True)
-            if target_mode == "3":
-                resized_image = image.resize((width, height), Image.NEAREST)
-                img_bw, img_rw = self.tricolor(resized_image)
-            else:
-                resized_image = image.resize((width, height)).convert(target_mode)
+    def render_metrics(self):
+        """Return the metrics of all screens in Prometheus text format."""
+        # reload_config adds and removes screens from another thread.
+        with self._reload_lock:
+            metrics = [pipeline.metrics for pipeline in self.pipelines.values()]
+        return render_prometheus(metrics, self.frame_stats())
 
-            if hasattr(display, "getbuffer"):
-                if target_mode != "3":
-                    buffer = display.getbuffer(resized_image)
-                    display.Clear(0xff)
-                    resized_image = buffer
-                else:
-                    img_bw = display.getbuffer(img_bw)
-                    img_rw = display.getbuffer(img_rw)
-            #if hasattr(display, "_get_frame_buffer"):
-            #    buffer = display._get_frame_buffer(resized_image)
-            #    resized_image = buffer
-            else:
-                print("Warning: Display getbuffer method not supported for this screen.")
-                #return
-        else:
-            resized_image = image.resize((width, height)).convert(target_mode)
-        if target_mode != "3":
-            if hasattr(display, "display"):
-                display.display(resized_image)
-                #if hasattr(display, "PART_UPDATE"):
-                #    device.PART_UPDATE
-            elif hasattr(display, "show"):
-                display.show(resized_image)
-            #elif hasattr(display, "smart_update"):
-            #    print("Smart update")
-            #    display.smart_update(resized_image)
-            #    sys.stdout.flush()
-            #elif hasattr(display, "display_frame"):
-            #    print("Display frame")
-            #    display.display_frame(resized_image)
-            elif hasattr(display, "display_partial_frame"):
-                print("Display partial frame")
-                loc = 25
-                display.display_partial_frame(resized_image, 0, 0, display.height, display.width, fast=True)
-            else:
-                print("Warning: Display method not supported for this screen.")
-        else:
-            if hasattr(display, "display"):
-                display.display(img_bw, img_rw)
-            elif hasattr(display, "show"):
-                display.show(img_bw, img_rw)
-            elif hasattr(display, "display_partial_frame"):
-                print("Display partial frame")
-                loc = 25
-                display.display_partial_frame(img_bw, img_rw, 0, 0, display.height, display.width, fast=True)
-            else:
-                print("Warning: Display method not supported for this screen.")
+    def start_metrics(self):
+        """Export metrics as configured in the metrics section of the config."""
+        metrics_config = self.config.get("metrics") or {}
+        if metrics_config.get("enabled", True) is False:
+            return None
+        try:
+            exporter = MetricsExporter(self.render_metrics, metrics_config.get("file"),
+                                       metrics_config.get("socket", DEFAULT_SOCKET),
+                                       metrics_config.get("interval", 5.0))
+        except OSError as e:
+            Log.log_error(f"Metrics export disabled: {e}")
+            return None
+        exporter.start()
+        return exporter
+
+    def start_offload(self):
+        """Start the transform worker processes if the offload section enables them."""
+        offload_config = self.config.get("offload") or {}
+        if not offload_config.get("enabled", False):
+            return None
+        pool = TransformPool(offload_config.get("workers"))
+        Log.log_event(f"Transforms offloaded to {pool.workers} worker processes")
+        return pool
 
     def run_display_cycle(self):
-        """Main loop to manage inputs and screens."""
-        last_frames = {screen: None for screen in self.screens}
-        while True:
-            for screen_name, screen_config in self.config["screens"].items():
-                settings = DISPLAY_SETTINGS.get(screen_config['name'], {})
-                input_name = screen_config.get("default_input")
-                if not input_name:
-                    print(f"No default_input defined for screen '{screen_name}'")
-                    continue
-                frame_input = self.config["frame_inputs"].get(input_name)
-                if not frame_input:
-                    print(f"Input '{input_name}' not found in frame_inputs for screen '{screen_name}'")
-                    continue
-                source_path = frame_input["path"]
-                display_name = screen_config["name"]
-                fps = DISPLAY_SETTINGS.get(screen_config['name'], {}).get("fps", 30)
-                try:
-                    if settings.get("mode", "RGB") == "3":
-                        current_image = Image.open(source_path).convert("L")
-                    else:
-                        current_image = Image.open(source_path).convert(settings.get("mode", "RGB"))
-                except (FileNotFoundError, IOError, Image.UnidentifiedImageError, SyntaxError) as e:
-                    current_image = last_frames.get(screen_name)
-                if current_image:
-                    self.show_image(current_image, screen_name)
-                    last_frames[screen_name] = current_image
-                time.sleep(1 / fps)
+        """Run one render worker per screen until stop() is called."""
+        self.stop_event.clear()
+        exporter = self.start_metrics()
+        self.offload = self.start_offload()
+        config_watch = None
+        if self.config.get("watch_config", True):
+            config_watch = watch_file(self.config_file, self.reload_config)
+        with self._reload_lock:
+            self.running = True
+            for screen_name in self.config["screens"]:
+                self._start_worker(screen_name)
+        self.stop_event.wait()
+        if config_watch is not None:
+            watcher, handle = config_watch
+            watcher.unwatch(handle)
+        with self._reload_lock:
+            self.running = False
+            for screen_name in list(self.workers):
+                self._stop_worker(screen_name)
+        for pipeline in self.pipelines.values():
+            pipeline.close()
+        if self.offload is not None:
+            self.offload.close()
+            self.offload = None
+        if exporter is not None:
+            exporter.stop()
+
+    def _start_worker(self, screen_name):
+        screen_config = self.config["screens"][screen_name]
+        fps = screen_config.get("fps", DISPLAY_SETTINGS.get(screen_config['name'], {}).get("fps", 30))
+        on_change = screen_config.get("pacing", "fps") == "on_change"
+        worker = ScreenWorker(self, screen_name, fps, on_change)
+        self.workers[screen_name] = worker
+        worker.start()
+
+    def _stop_worker(self, screen_name):
+        worker = self.workers.pop(screen_name, None)
+        if worker is None:
+            return
+        worker.stop()
+        # Idle workers sleep on their input, not on a timer.
+        frame_input = self.inputs.get(self.config["screens"][screen_name].get("default_input"))
+        if frame_input is not None:
+            frame_input.wake()
+        worker.join()
+
+    def frame_stats(self):
+        """Return achieved versus target fps and drop counts per screen."""
+        with self._reload_lock:
+            workers = list(self.workers.items())
+        return {name: worker.scheduler.stats() for name, worker in workers}
+
+    def stop(self):
+        """Stop all screen workers."""
+        self.stop_event.set()
 
 if __name__ == "__main__":
     import os
     CONFIG = os.path.join(os.path.dirname(__file__), 'config.yaml')
+    if sys.argv[1:2] == ["stats"]:
+        # python -m DCore stats: dump the metrics of the running instance.
+        with open(CONFIG, 'r') as file:
+            metrics_config = (yaml.safe_load(file) or {}).get("metrics") or {}
+        try:
+            print(read_stats(metrics_config.get("socket", DEFAULT_SOCKET), metrics_config.get("file")), end="")
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            print(e)
+            sys.exit(1)
+        sys.exit(0)
     display_manager = DisplayManager(CONFIG)
+    Log.log_startup()
     main_loop = Thread(target=display_manager.run_display_cycle, daemon=True)
     main_loop.start()
 
+    import signal
+    signal.signal(signal.SIGHUP, lambda signum, frame: display_manager.reload_config())
+
     # Replace busy-wait with a pause
     try:
         from signal import pause
         pause()  # Keeps the main thread alive efficiently
     except KeyboardInterrupt:
-        print("Shutting down display manager.")
-        sys.exit(0)
\ No newline at end of file
+        Log.log_shutdown()
+        display_manager.stop()
+        main_loop.join()
+        Log.shutdown()
+        sys.exit(0)
@@ -0,0 +1,81 @@
+import os
+from io import BytesIO
+from PIL import Image, ImageSequence
+
+FORMATS = ("image", "mjpeg", "raw")
+MJPEG_EXTENSIONS = (".mjpeg", ".mjpg")
+RAW_EXTENSIONS = (".raw", ".rgb", ".gray")
+READ_SIZE = 256 * 1024
+
+
+def detect_format(path):
+    """Guess the frame source format of a file from its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in MJPEG_EXTENSIONS:
+        return "mjpeg"
+    if extension in RAW_EXTENSIONS:
+        return "raw"
+    return "image"
+
+
+def image_frames(path, default_duration):
+    """Frames of a GIF, APNG, WebP or multi-page TIFF with their durations."""
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            duration = frame.info.get("duration")
+            yield frame.copy(), duration / 1000 if duration else default_duration
+
+
+def mjpeg_frames(path, default_duration, draft=None):
+    """JPEG frames of a concatenated (Motion JPEG) file, read in chunks.
+
+    draft() may return the (mode, size) hint of Image.draft, so frames
+    decode at the smallest DCT scale still covering the screens.
+    """
+    buffer = b""
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                return
+            buffer += chunk
+            while True:
+                start = buffer.find(b"\xff\xd8")
+                end = buffer.find(b"\xff\xd9", start + 2) if start >= 0 else -1
+                if end < 0:
+                    # Keep the partial frame, or nothing if no frame started yet.
+                    buffer = buffer[start:] if start >= 0 else b""
+                    break
+                with Image.open(BytesIO(buffer[start:end + 2])) as image:
+                    hint = draft() if draft is not None else None
+                    if hint is not None:
+                        image.draft(*hint)
+                    image.load()
+                yield image, default_duration
+                buffer = buffer[end + 2:]
+
+
+def raw_frames(path, default_duration, width, height, mode):
+    """Fixed-size raw frames stored back to back."""
+    size = len(Image.new(mode, (width, height)).tobytes())
+    with open(path, "rb") as file:
+        while True:
+            data = file.read(size)
+            if len(data) < size:
+                return
+            yield Image.frombytes(mode, (width, height), data), default_duration
+
+
+def open_frames(config, draft=None):
+    """Return a generator of (frame, seconds) for an animation frame_inputs entry."""
+    path = config["path"]
+    source = config.get("format") or detect_format(path)
+    default_duration = 1 / config.get("fps", 10)
+    if source == "image":
+        return image_frames(path, default_duration)
+    if source == "mjpeg":
+        return mjpeg_frames(path, default_duration, draft)
+    if source == "raw":
+        return raw_frames(path, default_duration, config["width"], config["height"], config.get("mode", "RGB"))
+    raise ValueError(f"Unsupported animation format: {source}")
+
@@ -0,0 +1,98 @@
+from PIL import Image
+from DCore.pixels import load_numpy
+
+# Buffers per name in rotation: the frame being rendered, the one waiting
+# for the transfer thread and the one on the bus.
+POOL_DEPTH = 3
+# Freed PIL image memory kept per screen for the next frame's transpose,
+# resize, convert and diff images instead of going back to the allocator.
+PIL_CACHE_BYTES_PER_SCREEN = 4 * 1024 * 1024
+# PIL splits images into blocks of at most this size (or one line if that
+# is longer), so a cache of n blocks holds at most n times it.
+PIL_BLOCK_SIZE = 512 * 1024
+
+
+class BufferPool:
+    """Preallocated NumPy buffers of one screen's packed LCD path.
+
+    get() hands out the buffers of a name in rotation, so a buffer is only
+    written again once the frames rendered after it took its place on the
+    bus. The pool reaches its size on the first frames and stays there;
+    its bytes are reported as packed_buffer_bytes in the screen metrics.
+    PIL frames are not pooled here, see reuse_pil_blocks.
+    """
+
+    def __init__(self, metrics=None, depth=POOL_DEPTH):
+        self.metrics = metrics
+        self.depth = depth
+        self._rings = {}  # name -> [shape, dtype, buffers, next index]
+        self.bytes = 0
+
+    def get(self, name, shape, dtype, depth=None):
+        """Return the next NumPy buffer of name, (re)allocated when its shape changed."""
+        np = load_numpy()
+        ring = self._rings.get(name)
+        if ring is None or ring[0] != shape or ring[1] != dtype:
+            if ring is not None:
+                self._account(-sum(buffer.nbytes for buffer in ring[2]))
+            ring = self._rings[name] = [shape, dtype, [], 0]
+        buffers = ring[2]
+        if len(buffers) < (depth or self.depth):
+            buffer = np.empty(shape, dtype)
+            buffers.append(buffer)
+            self._account(buffer.nbytes)
+            return buffer
+        index = ring[3]
+        ring[3] = (index + 1) % len(buffers)
+        return buffers[index]
+
+    def clear(self):
+        """Drop every buffer, e.g. when the screen is removed."""
+        self._rings.clear()
+        self._account(-self.bytes)
+
+    def _account(self, nbytes):
+        self.bytes += nbytes
+        if self.metrics is not None:
+            self.metrics.packed_buffer_bytes = self.bytes
+            self.metrics.packed_buffer_peak_bytes = max(self.metrics.packed_buffer_peak_bytes, self.bytes)
+
+
+def image_bytes(image):
+    """Pixel memory PIL holds for an image: 4 bytes per pixel for multi-band and 32 bit modes."""
+    if image.mode == "I;16":
+        size = 2
+    elif len(image.getbands()) > 1 or image.mode in ("I", "F"):
+        size = 4
+    else:
+        size = 1
+    return image.width * image.height * size
+
+
+def payload_bytes(payload):
+    """Bytes of a driver payload: an image, a NumPy array, a buffer or a tuple of them."""
+    if payload is None:
+        return 0
+    if isinstance(payload, Image.Image):
+        return image_bytes(payload)
+    if isinstance(payload, (tuple, list)):
+        return sum(payload_bytes(part) for part in payload)
+    nbytes = getattr(payload, "nbytes", None)
+    return nbytes if nbytes is not None else len(payload)
+
+
+def reuse_pil_blocks(screens, cache_bytes=None):
+    """Let PIL keep freed image blocks for reuse, bounded by cache_bytes.
+
+    By default PIL hands the memory of every temporary image back to the
+    allocator; caching a few blocks per screen recycles it frame after
+    frame. Blocks are capped at PIL_BLOCK_SIZE, so full-size sources are
+    cached in pieces and the cache never holds more than cache_bytes.
+    Returns the number of blocks kept.
+    """
+    if cache_bytes is None:
+        cache_bytes = PIL_CACHE_BYTES_PER_SCREEN * max(1, screens)
+    Image.core.set_block_size(PIL_BLOCK_SIZE)
+    blocks = cache_bytes // PIL_BLOCK_SIZE
+    Image.core.set_blocks_max(blocks)
+    return blocks
@@ -0,0 +1,39 @@
+"""Producer side of the "received" frame input.
+
+Example::
+
+    from DCore.client import FrameProducer
+
+    producer = FrameProducer("dcore_input1")
+    producer.send(image)            # PIL image, converted to the ring's mode
+    producer.send_raw(buf, 320, 240, "RGBA", dirty=(0, 0, 320, 20))
+"""
+from DCore.shm_ring import FrameRing
+
+
+class FrameProducer:
+    """Writes frames into the shared-memory ring read by a DCore "received" input."""
+
+    def __init__(self, shm_name, width=None, height=None, mode="RGBA", slots=3):
+        # DCore creates the ring at startup; a producer started first can
+        # create it by passing the frame geometry. Either way frames are
+        # sent in the mode stored in the ring.
+        if width and height:
+            self.ring = FrameRing.open(shm_name, width, height, mode, slots)
+        else:
+            self.ring = FrameRing.attach(shm_name)
+        self.mode = self.ring.mode
+
+    def send_raw(self, data, width, height, mode, dirty=None):
+        """Publish raw pixel bytes, return the frame sequence number."""
+        return self.ring.write(data, width, height, mode, dirty)
+
+    def send(self, image, dirty=None):
+        """Publish a PIL image, return the frame sequence number."""
+        if image.mode != self.mode:
+            image = image.convert(self.mode)
+        return self.ring.write(image.tobytes(), image.width, image.height, image.mode, dirty)
+
+    def close(self):
+        """Detach from the ring."""
+        self.ring.close()
@@ -0,0 +1,20 @@
+from PIL import ImageChops
+
+
+def frame_bbox(previous, current):
+    """Return the bounding box that changed between two frames, or None if identical."""
+    if previous is None or previous.size != current.size or previous.mode != current.mode:
+        return (0, 0) + current.size
+    diff = ImageChops.difference(previous, current)
+    if diff.mode in ("RGBA", "LA", "PA"):
+        # getbbox() only looks at the alpha band of these modes.
+        diff = diff.convert("RGB")
+    return diff.getbbox()
+
+
+def align_bbox(bbox, size, step=8):
+    """Widen a bounding box horizontally to multiples of step, as EPD controllers require."""
+    left, top, right, bottom = bbox
+    left = left - left % step
+    right = min(size[0], right + (-right) % step)
+    return (left, top, right, bottom)
@@ -6,6 +6,7 @@ DISPLAY_SETTINGS = {
         "driver": "waveshare_epd",
         "class": "epd2in13_V2",
         "mode": "1",
+        "resample": "box",
         "width": 250,
         "height": 122,
     },
@@ -13,6 +14,7 @@ DISPLAY_SETTINGS = {
         "driver": "waveshare_epd",
         "class": "epd2in13_V3",
         "mode": "1",
+        "resample": "box",
         "width": 250,
         "height": 122,
     },
@@ -20,6 +22,7 @@ DISPLAY_SETTINGS = {
         "driver": "waveshare_epd",
         "class": "epd2in13_V4",
         "mode": "1",
+        "resample": "box",
         "width": 250,
         "height": 122,
     },
@@ -27,15 +30,20 @@ DISPLAY_SETTINGS = {
         "driver": "waveshare_epd",
         "class": "epd2in7",
         "mode": "1",
+        "resample": "box",
         "width": 264,
         "height": 176,
+        "min_refresh_interval": 5,
     },
     "waveshare_2.7_tri": {
         "driver": "waveshare_epd",
         "class": "epd2in7b",
         "mode": "3",
+        "resample": "nearest",
         "width": 264,
         "height": 176,
+        # No partial refresh: every update is a ~15 s full refresh.
+        "min_refresh_interval": 30,
     },
     # Waveshare 2.7" with partial refresh
     # https://github.com/elad661/rpi_epd2in7
@@ -43,6 +51,7 @@ DISPLAY_SETTINGS = {
         "driver": "waveshare_epd",
         "class": "epd2in7a",
         "mode": "1",
+        "resample": "box",
         "rotate": 1,
         "width": 176,
         "height": 264,
@@ -55,6 +64,7 @@ DISPLAY_SETTINGS = {
         "height": 64,
         "rotate": 0,
         "mode": "1",
+        "resample": "box",
         "pins": {
             "dc": 24,
             "reset": 25,
@@ -77,6 +87,7 @@ DISPLAY_SETTINGS = {
         "height": 240,
         "rotate": 0,
         "mode": "RGB",
+        "resample": "bilinear",
         "pins": {
             "dc": 25, 
             "reset": 27,
@@ -98,6 +109,7 @@ DISPLAY_SETTINGS = {
         "width": 128,
         "height": 128,
         "mode": "RGB",
+        "resample": "bilinear",
         "pins": {
             "dc": 25, 
             "reset": 27,
@@ -119,6 +131,7 @@ DISPLAY_SETTINGS = {
         "height": 240,
         "rotate": 1,
         "mode": "RGB",
+        "resample": "bilinear",
         "pins": {
             "dc": 25, 
             "reset": 27,
@@ -141,6 +154,7 @@ DISPLAY_SETTINGS = {
         "height": 240,
         "rotate": 0,
         "mode": "RGBA",
+        "resample": "bilinear",
         "bgr": False,
         "pins": {
             "dc": 22, 
@@ -164,6 +178,7 @@ DISPLAY_SETTINGS = {
         "height": 240,
         "rotate": 2,
         "mode": "RGB",
+        "resample": "bilinear",
         "pins": {
             "dc": 25, 
             "reset": 27,
@@ -185,6 +200,7 @@ DISPLAY_SETTINGS = {
         "width": 320,
         "height": 240,
         "mode": "RGB",
+        "resample": "bilinear",
         "pins": {
             "dc": 9, 
             "cs": 1,
@@ -207,6 +223,7 @@ DISPLAY_SETTINGS = {
         "invert": False,
         "inverse": True,
         "mode": "RGB",
+        "resample": "bilinear",
         "pins": {
             "dc": 24,
             "reset": 25,
@@ -219,6 +236,18 @@ DISPLAY_SETTINGS = {
         "fps": 60,
     },
 
+    # Virtual (no hardware): width, height, mode, output, path, shm_name,
+    # history and fps can be set per screen in config.yaml.
+    "virtual": {
+        "driver": "virtual",
+        "class": "VirtualDisplay",
+        "width": 320,
+        "height": 240,
+        "mode": "RGB",
+        "resample": "bilinear",
+        "output": "memory",  # "png", "raw" (mmap file) or "shm" (frame ring)
+        "fps": 60,
+    },
     # Tests:
     
 
@@ -0,0 +1,98 @@
+from functools import lru_cache
+from PIL import Image, ImageChops
+
+# "floyd" is PIL's error diffusion, the historical convert("1") output.
+# The others are position based: an unchanged area of the source always
+# gives the same pixels, so damage diffs and partial refreshes stay small.
+DITHERS = ("floyd", "threshold", "bayer", "blue_noise")
+BLUE_NOISE_TILE = 64
+_NONZERO = [0] + [255] * 255
+
+
+def _bayer(order):
+    """Bayer index matrix of size 2**order, values 0 .. 4**order - 1."""
+    matrix = [[0]]
+    for _ in range(order):
+        size = len(matrix)
+        matrix = [[4 * matrix[y % size][x % size] + (0, 2, 3, 1)[(y // size) * 2 + x // size]
+                   for x in range(2 * size)] for y in range(2 * size)]
+    return matrix
+
+
+@lru_cache(maxsize=8)
+def _tile(kind, size):
+    """One period of a threshold mask as an L image."""
+    if kind == "bayer":
+        matrix = _bayer(size.bit_length() - 1)
+        levels = size * size
+        data = [int((value + 0.5) * 256 / levels) for row in matrix for value in row]
+    elif kind == "blue_noise":
+        # Interleaved gradient noise: cheap, deterministic and close to blue noise.
+        data = [int(256 * ((52.9829189 * ((0.06711056 * x + 0.00583715 * y) % 1)) % 1))
+                for y in range(size) for x in range(size)]
+    else:
+        raise ValueError(f"Unsupported dither: {kind}")
+    tile = Image.new("L", (size, size))
+    tile.putdata(data)
+    return tile
+
+
+@lru_cache(maxsize=8)
+def threshold_mask(kind, size, bayer_size=4):
+    """Threshold mask covering size, tiled from a cached period."""
+    tile = _tile(kind, bayer_size if kind == "bayer" else BLUE_NOISE_TILE)
+    mask = Image.new("L", size)
+    for top in range(0, size[1], tile.height):
+        for left in range(0, size[0], tile.width):
+            mask.paste(tile, (left, top))
+    return mask
+
+
+def _above(image, mask):
+    """255 where a pixel is brighter than its mask threshold, else 0."""
+    return ImageChops.subtract(image, mask).point(_NONZERO)
+
+
+def dither(image, method="floyd", threshold=128, bayer_size=4):
+    """Convert an image to mode "1" with the given dithering method."""
+    if method == "floyd":
+        return image.convert("1")
+    gray = image if image.mode == "L" else image.convert("L")
+    if method == "threshold":
+        return gray.point([0] * threshold + [255] * (256 - threshold), "1")
+    if method not in DITHERS:
+        raise ValueError(f"Unsupported dither: {method}")
+    return ImageChops.subtract(gray, threshold_mask(method, gray.size, bayer_size)).point(_NONZERO, "1")
+
+
+@lru_cache(maxsize=8)
+def _ramp_tables(level):
+    """Scale the gray ranges below and above the red level to 0..255."""
+    low = [min(255, round(value * 255 / level)) if value < level else 255 for value in range(256)]
+    high = [round((value - level) * 255 / (255 - level)) if value > level else 0 for value in range(256)]
+    return low, high
+
+
+def dither_tricolor(gray, thresholds, method):
+    """Three-level black/red/white quantization with a threshold mask.
+
+    Gray levels between black and the red level (the middle of the
+    thresholds) dither between black and red, lighter ones between red
+    and white. Returns the same (black, red) planes as split_tricolor.
+    """
+    low, high = thresholds
+    level = min(254, max(1, (low + high) // 2))
+    low_table, high_table = _ramp_tables(level)
+    if method == "floyd":
+        palette = Image.new("P", (1, 1))
+        palette.putpalette([0, 0, 0, level, level, level, 255, 255, 255] + [255] * 759)
+        levels = gray.convert("RGB").quantize(palette=palette, dither=Image.Dither.FLOYDSTEINBERG).convert("L")
+        not_black = levels.point(_NONZERO)
+        white = levels.point([0] * 255 + [255])
+    else:
+        mask = threshold_mask(method, gray.size)
+        not_black = _above(gray.point(low_table), mask)
+        white = _above(gray.point(high_table), mask)
+    # Red plane: 0 where a pixel is red, i.e. neither black nor white.
+    not_red = ImageChops.lighter(ImageChops.invert(not_black), white)
+    return not_black.point(_NONZERO, "1"), not_red.convert("RGB")
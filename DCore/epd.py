@@ -0,0 +1,159 @@
+import time
+from DCore.damage import align_bbox
+import DCore.log as Log
+
+# Defaults of the refresh policy, overridable per panel in DISPLAY_SETTINGS
+# and per screen in config.yaml.
+FULL_REFRESH_EVERY = 20  # partial refreshes before a full one clears the ghosting
+FULL_REFRESH_INTERVAL = 600.0  # seconds
+MIN_REFRESH_INTERVAL = 1.0  # seconds between the end of a refresh and the next
+COALESCE = 0.5  # seconds to let a burst of input changes settle
+
+
+class EpdRefresher:
+    """Refresh policy of one e-paper panel.
+
+    Frames go out as partial refreshes when the driver has them; a full
+    refresh is forced after full_every partials or full_interval seconds,
+    and for the first frame. due() merges bursts of input changes and keeps
+    min_interval between refreshes, so the render loop never queues up
+    multi-second refreshes.
+    """
+
+    def __init__(self, full, partial=None, full_every=FULL_REFRESH_EVERY,
+                 full_interval=FULL_REFRESH_INTERVAL, min_interval=MIN_REFRESH_INTERVAL,
+                 coalesce=COALESCE, clock=time.monotonic):
+        self.full = full
+        self.partial = partial
+        self.full_every = full_every
+        self.full_interval = full_interval
+        self.min_interval = min_interval
+        self.coalesce = coalesce
+        self.clock = clock
+        self.partials_since_full = 0
+        self.last_full = None
+        self.last_refresh = None
+        self.pending_since = None
+        self.partial_count = 0
+        self.full_count = 0
+
+    @classmethod
+    def from_settings(cls, full, partial, settings, screen_config):
+        """Build a refresher with the policy of a panel and screen configuration."""
+        def option(key, default):
+            return screen_config.get(key, settings.get(key, default))
+        return cls(full, partial,
+                   full_every=option("full_refresh_every", FULL_REFRESH_EVERY),
+                   full_interval=option("full_refresh_interval", FULL_REFRESH_INTERVAL),
+                   min_interval=option("min_refresh_interval", MIN_REFRESH_INTERVAL),
+                   coalesce=option("coalesce", COALESCE))
+
+    def due(self):
+        """True when a changed input may be refreshed now.
+
+        The first call after a change starts the coalescing window; once it
+        returns True the caller is expected to push the newest frame.
+        """
+        now = self.clock()
+        if self.last_refresh is None:
+            # Nothing on the panel yet: show the first frame right away.
+            return True
+        if self.pending_since is None:
+            self.pending_since = now
+        if now - self.pending_since < self.coalesce:
+            return False
+        if now - self.last_refresh < self.min_interval:
+            return False
+        self.pending_since = None
+        return True
+
+    def needs_full(self):
+        """True when the next refresh has to be a full one."""
+        if self.partial is None or self.last_full is None:
+            return True
+        if self.full_every and self.partials_since_full >= self.full_every:
+            return True
+        return bool(self.full_interval) and self.clock() - self.last_full >= self.full_interval
+
+    def send(self, payload, frame, bbox):
+        """Refresh the panel with a frame, partially when the policy allows it."""
+        if self.needs_full():
+            self.full(payload, frame, bbox)
+            self.last_full = self.clock()
+            self.partials_since_full = 0
+            self.full_count += 1
+            Log.log_event(f"Full e-paper refresh after {self.partial_count} partial ones")
+        else:
+            self.partial(payload, frame, bbox)
+            self.partials_since_full += 1
+            self.partial_count += 1
+        self.last_refresh = self.clock()
+
+
+def refresh_methods(display, tricolor=False):
+    """Return the (full, partial) refresh calls a waveshare driver offers.
+
+    Both take (payload, frame, bbox); payload is the getbuffer output when
+    the driver has getbuffer and the frame otherwise. partial is None when
+    the panel can only do full refreshes.
+    """
+    show = getattr(display, "display", None) or getattr(display, "show", None)
+    if tricolor:
+        if show is not None:
+            return (lambda payload, frame, bbox: show(*payload)), None
+        if hasattr(display, "display_partial_frame"):
+            return (lambda payload, frame, bbox: display.display_partial_frame(
+                *payload, 0, 0, display.height, display.width, fast=True)), None
+        return None, None
+
+    if hasattr(display, "getbuffer") and show is not None:
+        return _buffer_methods(display, show)
+
+    if hasattr(display, "display_partial_frame"):
+        # elad661 style driver: image based, with windowed partial refresh.
+        def partial(image, frame, bbox):
+            left, top, right, bottom = align_bbox(bbox, frame.size)
+            display.display_partial_frame(image.crop((left, top, right, bottom)),
+                left, top, bottom - top, right - left, fast=True)
+
+        if hasattr(display, "display_frame"):
+            return (lambda image, frame, bbox: display.display_frame(image)), partial
+        return (lambda image, frame, bbox: display.display_partial_frame(
+            image, 0, 0, display.height, display.width, fast=False)), partial
+    if hasattr(display, "smart_update"):
+        return (lambda image, frame, bbox: display.smart_update(image)), None
+    return None, None
+
+
+def _buffer_methods(display, show):
+    """Full/partial calls of the getbuffer based waveshare drivers."""
+    part_mode = hasattr(display, "FULL_UPDATE") and hasattr(display, "PART_UPDATE")
+    display_partial = getattr(display, "displayPartial", None)
+    if display_partial is None and part_mode:
+        # Older drivers refresh with the partial LUT once initialized for it.
+        display_partial = show
+    if display_partial is None:
+        return (lambda buffer, frame, bbox: show(buffer)), None
+
+    # The base image goes to both RAM banks so the following partial
+    # refreshes have a correct "previous" frame to diff against.
+    base = (getattr(display, "displayPartBaseImage", None)
+            or getattr(display, "display_Base", None) or show)
+    state = {"partial": None}
+
+    def full(buffer, frame, bbox):
+        if state["partial"] is not False:
+            if part_mode:
+                display.init(display.FULL_UPDATE)
+            elif state["partial"]:
+                display.init()
+            state["partial"] = False
+        base(buffer)
+
+    def partial(buffer, frame, bbox):
+        if part_mode and state["partial"] is not True:
+            display.init(display.PART_UPDATE)
+        state["partial"] = True
+        display_partial(buffer)
+
+    return full, partial
@@ -0,0 +1,81 @@
+from threading import Lock
+
+
+class _Entry:
+    __slots__ = ("frame", "users", "lock", "extras")
+
+    def __init__(self):
+        self.frame = None
+        self.users = set()
+        self.lock = Lock()
+        self.extras = {}
+
+
+class DerivedFrameCache:
+    """Transformed frames shared between the screens that need them.
+
+    Entries are keyed on the input, its version and the screen's transform
+    settings (mode, size, rotation, dither, resampling), so each distinct
+    transform of an input version is computed once however many screens
+    show it. Every screen holds a reference to the entry it last acquired;
+    an entry is evicted as soon as no screen references it anymore.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries = {}
+        self._held = {}  # screen -> key
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, screen_name, key, build):
+        """Return the frame for key, calling build() if no screen computed it yet."""
+        with self._lock:
+            self._release(screen_name, keep=key)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            entry.users.add(screen_name)
+            self._held[screen_name] = key
+        # Build outside the cache lock so unrelated transforms run concurrently;
+        # screens asking for the same key wait on the entry instead.
+        with entry.lock:
+            if entry.frame is None:
+                self.misses += 1
+                entry.frame = build()
+            else:
+                self.hits += 1
+            return entry.frame
+
+    def extra(self, screen_name, name, build):
+        """Return data derived from the frame a screen holds, computed once per entry.
+
+        Used for driver payloads (e.g. packed RGB565 buffers) that screens
+        sharing a frame and a pixel format can reuse.
+        """
+        with self._lock:
+            entry = self._entries.get(self._held.get(screen_name))
+        if entry is None:
+            return build()
+        with entry.lock:
+            if name not in entry.extras:
+                entry.extras[name] = build()
+            return entry.extras[name]
+
+    def release(self, screen_name):
+        """Drop the reference a screen holds, e.g. when it is removed."""
+        with self._lock:
+            self._release(screen_name)
+
+    def _release(self, screen_name, keep=None):
+        key = self._held.pop(screen_name, None)
+        if key is None or key == keep:
+            return
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.users.discard(screen_name)
+            if not entry.users:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,74 @@
+import fcntl
+import os
+import re
+import struct
+
+FBIOGET_VSCREENINFO = 0x4600
+FBIOGET_FSCREENINFO = 0x4602
+
+# xres, yres, xres_virtual, yres_virtual, xoffset, yoffset, bits_per_pixel,
+# grayscale, then offset/length/msb_right for red, green, blue and transp.
+_VAR_SCREENINFO = struct.Struct("8I12I")
+_VAR_SCREENINFO_SIZE = 160
+# id, smem_start, smem_len, type, type_aux, visual, xpanstep, ypanstep,
+# ywrapstep, line_length
+_FIX_SCREENINFO = struct.Struct("16sLIIIIHHHI")
+_FIX_SCREENINFO_SIZE = 80
+
+
+def device_path(path):
+    """Map "fb0" style names to their /dev node, leave other paths alone."""
+    if re.fullmatch(r"fb\d+", path):
+        return f"/dev/{path}"
+    return path
+
+
+def is_framebuffer(path):
+    """True when a frame_inputs path names a Linux framebuffer."""
+    return re.fullmatch(r"(/dev/)?fb\d+", path) is not None
+
+
+def _read_sysfs(name, attribute):
+    with open(f"/sys/class/graphics/{name}/{attribute}") as file:
+        return file.read().strip()
+
+
+def probe_geometry(path, fd):
+    """Return (width, height, bits_per_pixel, stride, red_offset, offset) of a framebuffer.
+
+    Asks the driver through the FBIOGET_*SCREENINFO ioctls and falls back
+    to sysfs. offset is the byte position of the visible (panned) area.
+    """
+    try:
+        var = fcntl.ioctl(fd, FBIOGET_VSCREENINFO, bytes(_VAR_SCREENINFO_SIZE))
+        fix = fcntl.ioctl(fd, FBIOGET_FSCREENINFO, bytes(_FIX_SCREENINFO_SIZE))
+        values = _VAR_SCREENINFO.unpack_from(var)
+        width, height, xoffset, yoffset, bpp = values[0], values[1], values[4], values[5], values[6]
+        red_offset = values[8]
+        stride = _FIX_SCREENINFO.unpack_from(fix)[-1]
+        return width, height, bpp, stride, red_offset, yoffset * stride + xoffset * bpp // 8
+    except OSError:
+        pass
+    name = os.path.basename(path)
+    width, height = (int(v) for v in _read_sysfs(name, "virtual_size").split(","))
+    bpp = int(_read_sysfs(name, "bits_per_pixel"))
+    stride = int(_read_sysfs(name, "stride"))
+    # sysfs has no channel layout, assume the usual little-endian XRGB/RGB565.
+    red_offset = 16 if bpp == 32 else 11 if bpp == 16 else 0
+    return width, height, bpp, stride, red_offset, 0
+
+
+def pixel_format(bpp, red_offset):
+    """Return the PIL (mode, rawmode) pair that reads a framebuffer layout.
+
+    Image.frombuffer only wraps the mapping when mode equals rawmode.
+    """
+    if bpp == 32:
+        return ("RGBX", "RGBX") if red_offset == 0 else ("RGB", "BGRX")
+    if bpp == 24:
+        return ("RGB", "RGB") if red_offset == 0 else ("RGB", "BGR")
+    if bpp == 16:
+        return ("RGB", "BGR;16")
+    if bpp == 8:
+        return ("L", "L")
+    raise ValueError(f"Unsupported framebuffer depth: {bpp} bpp")
@@ -0,0 +1,524 @@
+import mmap
+import os
+import zlib
+import queue
+import time
+from threading import Lock, Condition, Event, Thread
+from PIL import Image, ImageOps
+from DCore.watcher import watch_file
+from DCore.shm_ring import FrameRing
+from DCore.framebuffer import device_path, is_framebuffer, probe_geometry, pixel_format
+from DCore.animation import open_frames
+import DCore.log as Log
+
+
+class FrameInput:
+    """Base class of frame inputs: a versioned frame plus change notification.
+
+    Subclasses implement _poll(), which runs under the input lock and calls
+    _publish() when it has a new frame. Sources that cannot signal changes
+    set poll_timeout so waiting screens re-check them periodically, and
+    clear the dirty flag in _poll() so that wait does not return at once.
+    """
+
+    poll_timeout = None
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.version = 0
+        self.frame = None
+        self._converted = {}
+        self._lock = Lock()
+        self._changed = Condition()
+        self._dirty = True
+        self._listeners = []
+
+    def poll(self):
+        """Refresh the frame from the source. Return True on a new frame."""
+        with self._lock:
+            return self._poll()
+
+    def _poll(self):
+        raise NotImplementedError
+
+    def _publish(self, frame):
+        self.frame = frame
+        self._converted = {}
+        self.version += 1
+
+    def notify(self):
+        """Mark the source as changed and wake the screens waiting on it."""
+        with self._changed:
+            self._dirty = True
+            self._changed.notify_all()
+        for listener in self._listeners:
+            listener()
+
+    def add_listener(self, callback):
+        """Call callback whenever the source signals a change."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def wake(self):
+        """Wake waiting screens without marking a change, e.g. to let them stop."""
+        with self._changed:
+            self._changed.notify_all()
+
+    def _take_dirty(self):
+        with self._changed:
+            dirty = self._dirty
+            self._dirty = False
+            return dirty
+
+    def get_frame(self, mode):
+        """Return the current frame converted to mode, converting once per version."""
+        return self.snapshot(mode)[1]
+
+    def snapshot(self, mode):
+        """Return (version, frame) with the frame converted to mode."""
+        with self._lock:
+            if self.frame is None:
+                return self.version, None
+            if self.frame.mode == mode:
+                return self.version, self.frame
+            frame = self._converted.get(mode)
+            if frame is None:
+                frame = self.frame.convert(mode)
+                self._converted[mode] = frame
+            return self.version, frame
+
+    def wait_for_change(self, version, stop_event):
+        """Block until the input has a frame other than version or stop_event is set."""
+        while not stop_event.is_set():
+            self.poll()
+            if self.frame is not None and self.version != version:
+                return True
+            with self._changed:
+                self._changed.wait_for(lambda: self._dirty or stop_event.is_set(), self.poll_timeout)
+        return False
+
+    def set_consumers(self, consumers):
+        """Tell the input which screens show it, as {key: (input_mode, transform, size)}.
+
+        size is the screen's target size in the source's orientation;
+        layouts placing the input register with no transform and no size.
+        Inputs decoding JPEGs use it to decode at a reduced scale, inputs
+        that decode ahead to hand out frames already transformed for each
+        screen; the others ignore it.
+        """
+
+    def transformed(self, version, key):
+        """Return the frame of version already transformed for key, or None."""
+        return None
+
+    def close(self):
+        """Release the resources held by the input."""
+
+
+def draft_hint(consumers):
+    """(mode, size) to hand Image.draft so a JPEG decodes no larger than needed.
+
+    size covers the largest screen; None when a screen shows the source at
+    its own size. The mode is "L" when every screen wants grayscale.
+    """
+    if not consumers:
+        return None
+    sizes = [size for _, _, size in consumers.values()]
+    if None in sizes:
+        return None
+    modes = {mode for mode, _, _ in consumers.values()}
+    mode = "L" if modes == {"L"} else None
+    return mode, (max(width for width, _ in sizes), max(height for _, height in sizes))
+
+
+class RetrievedInput(FrameInput):
+    """Frame input read from an image file written by another process.
+
+    The file is watched with inotify (or polled when inotify is not
+    available) and only decoded again after the producer finished writing.
+    """
+
+    def __init__(self, name, config):
+        super().__init__(name, config)
+        self.path = config["path"]
+        self._key = None
+        self._failed_key = None
+        self._draft = None
+        self._watcher, self._watch = watch_file(
+            self.path, self.notify, config.get("watch", "auto"), config.get("poll_interval", 0.05))
+
+    def _stat_key(self):
+        st = os.stat(self.path)
+        return (self.path, st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _poll(self):
+        if not self._take_dirty():
+            return False
+        try:
+            key = self._stat_key()
+        except OSError:
+            return False
+        if key == self._key or key == self._failed_key:
+            return False
+        try:
+            with Image.open(self.path) as image:
+                if self._draft is not None:
+                    image.draft(*self._draft)
+                image.load()
+            if self._stat_key() != key:
+                # Rewritten while we were decoding, the watcher flags it again.
+                return False
+        except (OSError, Image.UnidentifiedImageError, SyntaxError, ValueError):
+            # Half-written or corrupt file: keep the last good frame and retry
+            # once the file changes again.
+            self._failed_key = key
+            return False
+        self._key = key
+        self._failed_key = None
+        self._publish(image)
+        return True
+
+    def set_consumers(self, consumers):
+        draft = draft_hint(consumers)
+        if draft != self._draft:
+            with self._lock:
+                self._draft = draft
+                # Decode the current file again at the new scale.
+                self._key = None
+            self.notify()
+
+    def close(self):
+        self._watcher.unwatch(self._watch)
+
+
+class ReceivedInput(FrameInput):
+    """Frame input pushed by a producer through a shared-memory frame ring.
+
+    Frames are copied out of the ring slot in one pass (Image.frombuffer
+    over the slot, then copy()): the producer reuses the slot a few frames
+    later, while the derived frame, the diff reference and queued transfers
+    may still hold the frame. A frame whose slot was rewritten during the
+    copy is dropped. See DCore.client for the producer side.
+    """
+
+    def __init__(self, name, config):
+        super().__init__(name, config)
+        self.shm_name = config.get("shm_name", f"dcore_{name}")
+        self.poll_timeout = config.get("poll_interval", 0.01)
+        self.ring = FrameRing.open(self.shm_name, config["width"], config["height"],
+                                   config.get("mode", "RGBA"), config.get("slots", 3))
+        self._sequence = 0
+
+    def _poll(self):
+        # Nothing notifies a ring, clear the flag so waits use poll_timeout.
+        self._take_dirty()
+        sequence = self.ring.sequence
+        if sequence == self._sequence:
+            return False
+        slot = self.ring.read(sequence)
+        if slot is None:
+            # The producer is already reusing the slot, take the next frame.
+            return False
+        sequence, width, height, mode, _dirty, data = slot
+        frame = Image.frombuffer(mode, (width, height), data, "raw", mode, 0, 1).copy()
+        if not self.ring.is_current(sequence):
+            # Torn: the producer wrote into the slot while it was copied.
+            return False
+        self._sequence = sequence
+        self._publish(frame)
+        return True
+
+    def close(self):
+        with self._lock:
+            self.frame = None
+            self._converted = {}
+            self.ring.close()
+
+
+class FramebufferInput(FrameInput):
+    """Frame input mirroring a Linux framebuffer device (/dev/fbN).
+
+    The device is memory-mapped once and each changed frame is read from
+    the mapping into an image of its own, as the console keeps drawing
+    into the mapping while published frames are diffed and sent. Changes
+    are found with a CRC over a rotating subset of rows, so every row is
+    checked within sample_step polls while each poll only reads a few
+    kilobytes.
+
+    width, height, bpp, stride and red_offset can be given in the config,
+    e.g. to read a dump or a regular file standing in for the device.
+    """
+
+    def __init__(self, name, config):
+        super().__init__(name, config)
+        self.path = device_path(config["path"])
+        self.poll_timeout = config.get("poll_interval", 0.05)
+        self._file = open(self.path, "rb")
+        if all(key in config for key in ("width", "height", "bpp")):
+            width, height, bpp = config["width"], config["height"], config["bpp"]
+            stride = config.get("stride", width * bpp // 8)
+            red_offset = config.get("red_offset", 16 if bpp == 32 else 11 if bpp == 16 else 0)
+            offset = config.get("offset", 0)
+        else:
+            width, height, bpp, stride, red_offset, offset = probe_geometry(self.path, self._file.fileno())
+        self.size = (width, height)
+        self.stride = stride
+        self.offset = offset
+        self.mode, self.rawmode = pixel_format(bpp, red_offset)
+        self._map = mmap.mmap(self._file.fileno(), offset + stride * height, mmap.MAP_SHARED, mmap.PROT_READ)
+        self._view = memoryview(self._map)[offset:offset + stride * height]
+        self.sample_step = config.get("sample_step", max(1, height // 16))
+        self._phase = 0
+        self._checksums = {}
+
+    def _checksum(self, phase):
+        crc = 0
+        for row in range(phase, self.size[1], self.sample_step):
+            start = row * self.stride
+            crc = zlib.crc32(self._view[start:start + self.stride], crc)
+        return crc
+
+    def _poll(self):
+        # The device cannot notify, clear the flag so waits use poll_timeout.
+        self._take_dirty()
+        phase = self._phase
+        self._phase = (phase + 1) % self.sample_step
+        crc = self._checksum(phase)
+        if self.frame is not None and self._checksums.get(phase) == crc:
+            return False
+        if self.frame is None:
+            self._checksums = {p: self._checksum(p) for p in range(self.sample_step)}
+        else:
+            self._checksums[phase] = crc
+        frame = Image.frombuffer(self.mode, self.size, self._view, "raw", self.rawmode, self.stride, 1)
+        if self.mode == self.rawmode:
+            # Only this layout is wrapped over the mapping, the others are decoded.
+            frame = frame.copy()
+        self._publish(frame)
+        return True
+
+    def close(self):
+        with self._lock:
+            self.frame = None
+            self._converted = {}
+            try:
+                self._view.release()
+                self._map.close()
+            except BufferError:
+                # A frame wrapping the mapping is still referenced elsewhere.
+                pass
+            self._file.close()
+
+
+class AnimationInput(FrameInput):
+    """Frame input playing an animated image, MJPEG or raw frame sequence.
+
+    A decoder thread reads ahead into a bounded queue, converting and
+    transforming every frame for the screens showing the input, so the
+    render threads only swap in ready frames. Frames are shown for their
+    own duration; when playback falls behind, late frames are skipped.
+    """
+
+    def __init__(self, name, config):
+        super().__init__(name, config)
+        self.loop = config.get("loop", True)
+        self.mode = config.get("mode", "RGB")
+        self._queue = queue.Queue(maxsize=config.get("prefetch", 4))
+        self._consumers = {}
+        self._transformed = {}
+        self._due = None
+        self.skipped = 0
+        self._stop = Event()
+        self._draft = None
+        open_frames(config)  # fail early on a bad format
+        self._thread = Thread(target=self._decode, name=f"DCore-{name}-decoder", daemon=True)
+        self._thread.start()
+
+    @property
+    def poll_timeout(self):
+        if not self._thread.is_alive() and self._queue.empty():
+            return None  # played to the end
+        if self._due is None:
+            return 0.01
+        return min(0.1, max(0.005, self._due - time.monotonic()))
+
+    def set_consumers(self, consumers):
+        self._draft = draft_hint(consumers)
+        self._consumers = dict(consumers)
+
+    def transformed(self, version, key):
+        with self._lock:
+            if version != self.version:
+                return None
+            return self._transformed.get(key)
+
+    def _decode(self):
+        while not self._stop.is_set():
+            try:
+                for image, duration in open_frames(self.config, lambda: self._draft):
+                    if image.mode != self.mode:
+                        image = image.convert(self.mode)
+                    consumers = self._consumers
+                    converted = {mode: image.convert(mode) for mode, _, _ in consumers.values() if mode != self.mode}
+                    transformed = {key: transform(converted.get(mode, image))
+                                   for key, (mode, transform, _) in consumers.items() if transform is not None}
+                    while not self._stop.is_set():
+                        try:
+                            self._queue.put((image, duration, converted, transformed), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    if self._stop.is_set():
+                        return
+            except (OSError, Image.UnidentifiedImageError, SyntaxError, ValueError) as e:
+                Log.log_error(f"Input '{self.name}' decoding stopped: {e}")
+                return
+            if not self.loop:
+                return
+
+    def _poll(self):
+        # Frames come due by the clock, not by notify(); clear the flag so
+        # waits sleep until poll_timeout, which tracks the next due time.
+        self._take_dirty()
+        now = time.monotonic()
+        if self._due is not None and now < self._due:
+            return False
+        entry = None
+        while True:
+            try:
+                next_entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None:
+                self.skipped += 1
+            entry = next_entry
+            self._due = (now if self._due is None else self._due) + entry[1]
+            if self._due > now:
+                break
+        if entry is None:
+            return False
+        image, duration, converted, transformed = entry
+        self._publish(image)
+        self._converted = converted
+        self._transformed = transformed
+        return True
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+FITS = ("stretch", "contain", "cover")
+
+
+class _Tile:
+    __slots__ = ("frame_input", "box", "crop", "fit", "version", "image")
+
+    def __init__(self, frame_input, config):
+        self.frame_input = frame_input
+        self.box = tuple(config["box"])
+        self.crop = tuple(config["crop"]) if "crop" in config else None
+        self.fit = config.get("fit", "stretch")
+        if self.fit not in FITS:
+            raise ValueError(f"Unsupported tile fit: {self.fit}")
+        self.version = None
+        self.image = None
+
+
+class LayoutInput(FrameInput):
+    """Frame input compositing other frame_inputs into regions of one frame.
+
+    Each tile crops and scales its input into a box of the canvas. A tile
+    is only re-rendered when its own input has a new version, and only its
+    box is pasted into the next frame, so the screens' damage diff pushes
+    just that rectangle.
+    """
+
+    needs_inputs = True
+
+    def __init__(self, name, config, inputs):
+        super().__init__(name, config)
+        self.size = (config["width"], config["height"])
+        self.mode = config.get("mode", "RGB")
+        self.background = config.get("background", "black")
+        self.tiles = []
+        for tile_config in config["tiles"]:
+            frame_input = inputs.get(tile_config["input"])
+            if frame_input is None:
+                raise ValueError(f"Layout '{name}' tile input not found: {tile_config['input']}")
+            self.tiles.append(_Tile(frame_input, tile_config))
+        timeouts = [t.frame_input.poll_timeout for t in self.tiles if t.frame_input.poll_timeout]
+        self.poll_timeout = min(timeouts) if timeouts else None
+        for frame_input in {tile.frame_input for tile in self.tiles}:
+            frame_input.add_listener(self.notify)
+
+    def _render_tile(self, tile, image):
+        if tile.crop is not None:
+            image = image.crop(tile.crop)
+        left, top, right, bottom = tile.box
+        size = (right - left, bottom - top)
+        if tile.fit == "cover":
+            image = ImageOps.fit(image, size)
+        elif tile.fit == "contain":
+            fitted = ImageOps.contain(image, size)
+            image = Image.new(self.mode, size, self.background)
+            image.paste(fitted.convert(self.mode), ((size[0] - fitted.width) // 2, (size[1] - fitted.height) // 2))
+        elif image.size != size:
+            image = image.resize(size)
+        return image if image.mode == self.mode else image.convert(self.mode)
+
+    def _poll(self):
+        self._take_dirty()
+        changed = []
+        for tile in self.tiles:
+            tile.frame_input.poll()
+            version, image = tile.frame_input.snapshot(self.mode)
+            if image is not None and version != tile.version:
+                tile.version = version
+                tile.image = self._render_tile(tile, image)
+                changed.append(tile)
+        if not changed and self.frame is not None:
+            return False
+        if self.frame is None:
+            canvas = Image.new(self.mode, self.size, self.background)
+            changed = [tile for tile in self.tiles if tile.image is not None]
+        else:
+            # Published frames are shared with the screens, never paste into them.
+            canvas = self.frame.copy()
+        for tile in changed:
+            canvas.paste(tile.image, tile.box[:2])
+        self._publish(canvas)
+        return True
+
+    def close(self):
+        for frame_input in {tile.frame_input for tile in self.tiles}:
+            frame_input.remove_listener(self.notify)
+
+
+INPUT_TYPES = {
+    "retrieved": RetrievedInput,
+    "received": ReceivedInput,
+    "framebuffer": FramebufferInput,
+    "layout": LayoutInput,
+    "animation": AnimationInput,
+}
+
+
+def create_input(name, config, inputs=None):
+    """Build the frame input object for a frame_inputs entry.
+
+    inputs are the already created inputs a layout can place as tiles.
+    """
+    input_type = config.get("type", "retrieved")
+    if input_type == "retrieved" and is_framebuffer(config.get("path", "")):
+        input_type = "framebuffer"
+    input_class = INPUT_TYPES.get(input_type)
+    if not input_class:
+        raise ValueError(f"Unsupported input type: {input_type}")
+    if getattr(input_class, "needs_inputs", False):
+        return input_class(name, config, inputs or {})
+    return input_class(name, config)
@@ -1,35 +1,135 @@
+import atexit
 import logging
 import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from threading import Lock
 
-# Configure the logging
+# Default log location and limits, overridable from the logging section of config.yaml
 LOG_DIR = "DCore-logs"  # Directory for log files
-os.makedirs(LOG_DIR, exist_ok=True)  # Ensure the directory exists
-
 LOG_FILE = os.path.join(LOG_DIR, "dcore.log")
-logging.basicConfig(
-    level=logging.DEBUG,  # Log level
-    format="%(asctime)s [%(levelname)s] %(message)s",  # Log format
-    handlers=[
-        logging.FileHandler(LOG_FILE),  # Log to file
-        logging.StreamHandler()  # Log to console
-    ]
-)
-
-# Example logging functions
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+MAX_BYTES = 1024 * 1024
+BACKUPS = 3
+REPEAT_INTERVAL = 10.0
+
+logger = logging.getLogger("DCore")
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop repeats of a message for interval seconds.
+
+    A failing screen retries every second; this keeps one line per
+    interval instead, and the next copy let through says how many
+    were dropped in between.
+    """
+
+    def __init__(self, interval=REPEAT_INTERVAL, max_keys=256):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._seen = {}  # (level, message) -> [last emitted, suppressed]
+        self._lock = Lock()
+
+    def filter(self, record):
+        if self.interval <= 0:
+            return True
+        message = record.getMessage()
+        key = (record.levelno, message)
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.interval:
+                seen[1] += 1
+                return False
+            if seen is not None and seen[1]:
+                record.msg = f"{message} (repeated {seen[1]} more times)"
+                record.args = None
+            if seen is None and len(self._seen) >= self.max_keys:
+                self._seen = {k: v for k, v in self._seen.items() if now - v[0] < self.interval}
+            self._seen[key] = [now, 0]
+        return True
+
+
+def _level(value, default):
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return value
+    return logging.getLevelName(str(value).upper())
+
+
+def setup(config=None):
+    """(Re)configure logging from the logging section of config.yaml.
+
+    Callers only put records on a queue; a listener thread does the file
+    and console I/O, so a slow SD card never stalls a render thread.
+    """
+    global _listener
+    config = config or {}
+    shutdown()
+    path = config.get("file", LOG_FILE)
+    handlers = []
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)  # Ensure the directory exists
+        file_handler = RotatingFileHandler(path, maxBytes=config.get("max_bytes", MAX_BYTES),
+                                           backupCount=config.get("backups", BACKUPS))
+        file_handler.setLevel(_level(config.get("file_level"), logging.NOTSET))
+        handlers.append(file_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(_level(config.get("console_level"), logging.WARNING))
+    handlers.append(console_handler)
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    queue_handler.addFilter(RateLimitFilter(config.get("repeat_interval", REPEAT_INTERVAL)))
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    logger.setLevel(_level(config.get("level"), logging.INFO))
+    logger.propagate = False
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown)
+
+
 def log_startup():
-    logging.info("DCore display manager started.")
+    logger.info("DCore display manager started.")
 
 def log_shutdown():
-    logging.info("DCore display manager shutting down.")
+    logger.info("DCore display manager shutting down.")
 
 def log_error(error_message):
-    logging.error(f"Error occurred: {error_message}")
+    logger.error(f"Error occurred: {error_message}")
+
+def log_warning(message):
+    logger.warning(message)
 
 def log_event(event_description):
-    logging.debug(f"Event: {event_description}")
+    logger.debug(f"Event: {event_description}")
 
 # Example usage
 if __name__ == "__main__":
+    setup({"level": "DEBUG", "console_level": "DEBUG"})
     log_startup()
     try:
         # Simulate some events
@@ -0,0 +1,218 @@
+import os
+import resource
+import socket
+import time
+from bisect import bisect_left
+from threading import Thread, Event
+from PIL import Image
+import DCore.log as Log
+
+DEFAULT_SOCKET = "/tmp/dcore-stats.sock"
+STAGES = ("decode", "transform", "diff", "prepare", "push")
+# Upper bounds in seconds, from 100 us to 10 s: covers an LCD blit up to a
+# tri-color e-paper refresh.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, cheap enough to record every frame."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def record(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class ScreenMetrics:
+    """Per-screen stage latencies and frame counters."""
+
+    def __init__(self, screen_name):
+        self.screen_name = screen_name
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.pushed = 0
+        self.unchanged = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Bytes held by the screen's BufferPool, now and at most. Only the
+        # NumPy-packed LCD path is pooled, these stay 0 for other screens.
+        self.packed_buffer_bytes = 0
+        self.packed_buffer_peak_bytes = 0
+        # Frame memory the screen holds after a push, now and at most: the
+        # transformed frame, its panel-orientation copy, the driver payload
+        # and the pooled packed buffers.
+        self.frame_bytes = 0
+        self.frame_peak_bytes = 0
+
+    def record(self, stage, seconds):
+        self.stages[stage].record(seconds)
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def render_prometheus(metrics, frame_stats):
+    """Render all screen metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP dcore_stage_seconds Render stage latency per screen.",
+        "# TYPE dcore_stage_seconds histogram",
+    ]
+    for screen in metrics:
+        for stage, histogram in screen.stages.items():
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                labels = _labels(screen=screen.screen_name, stage=stage, le=bound)
+                lines.append(f"dcore_stage_seconds_bucket{labels} {cumulative}")
+            labels = _labels(screen=screen.screen_name, stage=stage)
+            lines.append(f"dcore_stage_seconds_sum{labels} {histogram.total:.6f}")
+            lines.append(f"dcore_stage_seconds_count{labels} {histogram.count}")
+    counters = (
+        ("dcore_frames_pushed_total", "counter", "Frames sent to the driver.", lambda s, f: s.pushed),
+        ("dcore_frames_unchanged_total", "counter", "Frames skipped because nothing changed.", lambda s, f: s.unchanged),
+        ("dcore_frames_dropped_total", "counter", "Frame slots dropped by the scheduler.", lambda s, f: f.get("dropped", 0)),
+        ("dcore_cache_hits_total", "counter", "Transformed frames reused from another screen.", lambda s, f: s.cache_hits),
+        ("dcore_cache_misses_total", "counter", "Transformed frames computed.", lambda s, f: s.cache_misses),
+        ("dcore_frame_bytes", "gauge", "Frame memory the screen holds after its last push.",
+         lambda s, f: s.frame_bytes),
+        ("dcore_frame_peak_bytes", "gauge", "High-water mark of the screen's frame memory.",
+         lambda s, f: s.frame_peak_bytes),
+        ("dcore_packed_buffer_bytes", "gauge", "Pooled NumPy buffers of the packed LCD path.",
+         lambda s, f: s.packed_buffer_bytes),
+        ("dcore_packed_buffer_peak_bytes", "gauge", "High-water mark of the pooled packed LCD buffers.",
+         lambda s, f: s.packed_buffer_peak_bytes),
+        ("dcore_fps", "gauge", "Frames pushed per second.", lambda s, f: f.get("achieved_fps", 0)),
+        ("dcore_loop_fps", "gauge", "Render loop iterations per second, pushed or not.",
+         lambda s, f: f.get("loop_fps", 0)),
+        ("dcore_target_fps", "gauge", "Configured frame rate.", lambda s, f: f.get("target_fps", 0)),
+    )
+    for name, kind, help_text, value in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for screen in metrics:
+            stats = frame_stats.get(screen.screen_name, {})
+            lines.append(f"{name}{_labels(screen=screen.screen_name)} {value(screen, stats)}")
+    for name, kind, help_text, value in process_memory():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def process_memory():
+    """(name, type, help, value) of the process-wide memory metrics."""
+    gauges = [("dcore_peak_rss_bytes", "gauge", "Peak resident memory of the process.",
+               resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)]
+    try:
+        with open("/proc/self/statm") as file:
+            resident = int(file.read().split()[1]) * resource.getpagesize()
+        gauges.append(("dcore_rss_bytes", "gauge", "Resident memory of the process.", resident))
+    except (OSError, ValueError, IndexError):
+        pass
+    stats = Image.core.get_stats()
+    gauges.append(("dcore_pil_cached_blocks", "gauge", "Freed PIL image blocks kept for reuse.", stats["blocks_cached"]))
+    gauges.append(("dcore_pil_reused_blocks_total", "counter", "PIL image blocks reused instead of allocated.",
+                   stats["reused_blocks"]))
+    return gauges
+
+
+class MetricsExporter(Thread):
+    """Publishes the metrics to a Prometheus text file and/or a Unix socket.
+
+    The file is rewritten atomically every interval seconds; the socket
+    answers every connection with the current text and closes it.
+    """
+
+    def __init__(self, render, path=None, socket_path=None, interval=5.0):
+        super().__init__(name="DCore-metrics", daemon=True)
+        self.render = render
+        self.path = path
+        self.socket_path = socket_path
+        self.interval = interval
+        self.stop_event = Event()
+        self._server = None
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(socket_path)
+            self._server.listen(4)
+            self._server.settimeout(interval)
+
+    def run(self):
+        next_write = time.monotonic()
+        while not self.stop_event.is_set():
+            if self.path and time.monotonic() >= next_write:
+                self._write_file()
+                next_write = time.monotonic() + self.interval
+            if self._server is None:
+                self.stop_event.wait(self.interval)
+                continue
+            try:
+                connection, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with connection:
+                text = self._render()
+                if text is None:
+                    continue
+                try:
+                    connection.sendall(text.encode())
+                except OSError as e:
+                    Log.log_error(f"Stats client went away: {e}")
+
+    def _render(self):
+        """The metrics text, or None if rendering failed; the exporter keeps running."""
+        try:
+            return self.render()
+        except Exception as e:
+            Log.log_error(f"Could not render metrics: {e!r}")
+            return None
+
+    def _write_file(self):
+        text = self._render()
+        if text is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                file.write(text)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            Log.log_error(f"Could not write metrics to {self.path}: {e}")
+
+    def stop(self):
+        """Stop exporting and remove the socket."""
+        self.stop_event.set()
+        if self._server is not None:
+            self._server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def read_stats(socket_path=None, path=None):
+    """Fetch the metrics text from a running DCore, via its socket or file."""
+    if socket_path and os.path.exists(socket_path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            chunks = []
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks).decode()
+    if path and os.path.exists(path):
+        with open(path) as file:
+            return file.read()
+    raise FileNotFoundError("No DCore stats socket or metrics file found, is DCore running?")
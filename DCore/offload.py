@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from threading import Lock
+from PIL import Image
+from DCore.pipeline import transform_frame
+import DCore.log as Log
+
+# Widest pixel a transform can produce (RGBA), to size result segments.
+MAX_BYTES_PER_PIXEL = 4
+# Segments a worker process keeps attached between frames.
+ATTACHED_SEGMENTS = 16
+
+_attached = OrderedDict()  # worker side: segment name -> SharedMemory
+
+
+def _release(shm, unlink=False):
+    try:
+        shm.close()
+    except BufferError:
+        # A frame still wraps the mapping, it goes away together with it.
+        pass
+    if unlink:
+        shm.unlink()
+
+
+def _segment(name):
+    """Attach to a segment in a worker process, keeping recent ones open.
+
+    Workers share DCore's resource tracker, so a plain attach is fine: the
+    segment stays registered until DCore unlinks it.
+    """
+    shm = _attached.pop(name, None)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)
+        while len(_attached) >= ATTACHED_SEGMENTS:
+            _release(_attached.popitem(last=False)[1])
+    _attached[name] = shm
+    return shm
+
+
+def _run(source_name, mode, size, length, result_name, args):
+    """Worker side of TransformPool.transform; returns (mode, size, length) of the result."""
+    image = Image.frombuffer(mode, size, _segment(source_name).buf[:length], "raw", mode, 0, 1)
+    frame = transform_frame(image, *args)
+    data = frame.tobytes()
+    _segment(result_name).buf[:len(data)] = data
+    return frame.mode, frame.size, len(data)
+
+
+class TransformPool:
+    """Runs the transform stage of the screens in worker processes.
+
+    Source frames and results go through shared-memory segments owned per
+    screen; only their names and the transform arguments are pickled. A
+    screen thread waits for its own transform, so frames stay in order per
+    screen while the screens transform in parallel on the other cores and
+    the main process keeps the driver I/O.
+    """
+
+    def __init__(self, workers=None):
+        # Forking a process running driver threads is unsafe, forkserver
+        # starts the workers from a clean one.
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+        self._segments = {}  # screen -> {"source": SharedMemory, "result": SharedMemory}
+        self._lock = Lock()
+        self.broken = False
+
+    def _segment(self, screen_name, role, size):
+        """A screen's segment of at least size bytes, replaced when too small."""
+        with self._lock:
+            segments = self._segments.setdefault(screen_name, {})
+            shm = segments.get(role)
+            if shm is None or shm.size < size:
+                if shm is not None:
+                    _release(shm, unlink=True)
+                shm = segments[role] = shared_memory.SharedMemory(create=True, size=size)
+            return shm
+
+    def transform(self, screen_name, image, args):
+        """Run transform_frame(image, *args) in a worker and return the result."""
+        if self.broken:
+            return transform_frame(image, *args)
+        data = image.tobytes()
+        source = self._segment(screen_name, "source", len(data))
+        source.buf[:len(data)] = data
+        width, height = args[1] or image.size
+        result = self._segment(screen_name, "result", width * height * MAX_BYTES_PER_PIXEL)
+        try:
+            mode, size, length = self.executor.submit(
+                _run, source.name, image.mode, image.size, len(data), result.name, args).result()
+        except BrokenProcessPool as e:
+            self.broken = True
+            Log.log_error(f"Transform workers died, transforming in process from now on: {e}")
+            return transform_frame(image, *args)
+        # The segment is rewritten by the next frame, copy the pixels out.
+        return Image.frombuffer(mode, size, result.buf[:length], "raw", mode, 0, 1).copy()
+
+    def release(self, screen_name):
+        """Free the segments of a screen that was removed."""
+        with self._lock:
+            for shm in self._segments.pop(screen_name, {}).values():
+                _release(shm, unlink=True)
+
+    def close(self):
+        """Stop the workers and free every segment."""
+        self.executor.shutdown()
+        for screen_name in list(self._segments):
+            self.release(screen_name)
@@ -0,0 +1,332 @@
+from inspect import signature
+from time import perf_counter
+from PIL import Image
+from DCore.damage import frame_bbox
+from DCore.tricolor import split_tricolor, DEFAULT_THRESHOLDS
+from DCore.dither import dither, DITHERS
+from DCore.metrics import ScreenMetrics
+from DCore.epd import EpdRefresher, refresh_methods
+from DCore.transfer import TransferThread
+from DCore.pixels import load_numpy, PACKERS, COLMOD_RGB565, LUMA_COLMOD, PADDED_COMMANDS
+from DCore.buffers import BufferPool, image_bytes, payload_bytes
+import DCore.log as Log
+
+# Without a dither setting: PIL's Floyd-Steinberg for 1-bit screens as
+# convert("1") always did, plain thresholds for tri-color ones.
+DEFAULT_DITHER = {"3": "threshold"}
+
+# Resampling tiers from fastest to sharpest. Tri-color screens default to
+# nearest so the thresholds see source gray levels, others to PIL's bicubic.
+RESAMPLING = {
+    "nearest": Image.NEAREST,
+    "box": Image.BOX,
+    "bilinear": Image.BILINEAR,
+    "bicubic": Image.BICUBIC,
+    "lanczos": Image.LANCZOS,
+}
+# Large downscales first reduce() by an integer factor while staying at
+# least this many times the target size, then resample the rest.
+REDUCING_GAP = 3.0
+
+# (inverse, rotate) -> the single transpose doing the horizontal flip
+# followed by rotate(90 * rotate, expand=True).
+TRANSPOSE_OPS = {
+    (False, 0): None,
+    (False, 1): Image.ROTATE_90,
+    (False, 2): Image.ROTATE_180,
+    (False, 3): Image.ROTATE_270,
+    (True, 0): Image.FLIP_LEFT_RIGHT,
+    (True, 1): Image.TRANSPOSE,
+    (True, 2): Image.FLIP_TOP_BOTTOM,
+    (True, 3): Image.TRANSVERSE,
+}
+
+
+def transform_frame(image, transpose, size, resample, reducing_gap, mode, dither_method):
+    """Flip, rotate, resize and convert a source image, see ScreenPipeline.transform."""
+    if transpose is not None:
+        image = image.transpose(transpose)
+    size = size or image.size
+    if image.size != size:
+        image = image.resize(size, resample, reducing_gap=reducing_gap)
+    if mode == "1" and image.mode != "1":
+        image = dither(image, dither_method)
+    elif mode is not None and image.mode != mode:
+        image = image.convert(mode)
+    return image
+
+
+class ScreenPipeline:
+    """Render path of one screen, resolved once when the screen is initialized.
+
+    Settings lookups, the EPD check and the choice of driver push method
+    happen here instead of on every frame. Flip and rotation are merged
+    into a single transpose, and resize/convert are skipped when they
+    would not change the frame.
+    """
+
+    def __init__(self, screen_name, screen_config, settings, display):
+        self.screen_name = screen_name
+        self.display = display
+        self.epd = display.__class__.__name__.startswith("EPD")
+        self.mode = settings.get("mode", "RGB")
+        self.size = (settings["width"], settings["height"]) if "width" in settings else None
+        self.rotate = settings.get("rotate", 0) if self.epd else 0
+        self.inverse = settings.get("inverse", False)
+        self.thresholds = screen_config.get(
+            "tricolor_thresholds", settings.get("tricolor_thresholds", DEFAULT_THRESHOLDS))
+        self.dither = screen_config.get("dither", settings.get("dither", DEFAULT_DITHER.get(self.mode, "floyd")))
+        if self.dither not in DITHERS:
+            raise ValueError(f"Unsupported dither: {self.dither}")
+        # Mode the input is asked for: 1-bit and tri-color screens work on
+        # grayscale and dither after scaling.
+        self.input_mode = "L" if self.mode in ("1", "3") else self.mode
+        self.transform_mode = None if self.mode == "3" else self.mode
+        resample = screen_config.get(
+            "resample", settings.get("resample", "nearest" if self.mode == "3" else "bicubic"))
+        if resample not in RESAMPLING:
+            raise ValueError(f"Unsupported resample: {resample}")
+        self.resample = RESAMPLING[resample]
+        self.reducing_gap = None if resample == "nearest" else screen_config.get(
+            "reducing_gap", settings.get("reducing_gap", REDUCING_GAP))
+        self.transpose = TRANSPOSE_OPS[(bool(self.inverse), self.rotate)]
+        # Target size before the transpose, i.e. in the source's orientation.
+        self.source_size = self.size
+        if self.size is not None and self.rotate % 2:
+            self.source_size = self.size[::-1]
+        self.key = (self.mode, self.size, self.rotate, self.inverse, self.dither, resample, self.reducing_gap)
+        # Plain values, so DCore.offload can run the transform in a worker process.
+        self.transform_args = (self.transpose, self.size, self.resample, self.reducing_gap,
+                               self.transform_mode, self.dither)
+        self.preprocess = None if self.epd else getattr(display, "preprocess", None)
+        self.last_frame = None
+        self.settings = settings
+        self.screen_config = screen_config
+        # E-paper refresh policy, set by _compile_push for waveshare drivers.
+        self.refresher = None
+        self.metrics = ScreenMetrics(screen_name)
+        # Reused payload buffers, so steady-state frames do not allocate them.
+        self.buffers = BufferPool(self.metrics)
+        self.packer, self.share_key = self._packer()
+        self.prepare, self.send = self._compile_push()
+        # LCD/OLED frames are written by a transfer thread while the worker
+        # renders the next one; e-papers pace themselves through the refresher.
+        self.double_buffer = not self.epd and screen_config.get(
+            "double_buffer", settings.get("double_buffer", True))
+        self.transfer = self._transfer_thread()
+
+    def transform(self, image):
+        """Flip, rotate, resize and convert a source image for this screen."""
+        return transform_frame(image, *self.transform_args)
+
+    def push(self, image, shared=None):
+        """Send a transformed frame, or only its damaged region, to the driver.
+
+        shared(name, build) memoizes a payload on the shared derived frame,
+        so screens with the same frame and payload format prepare it once.
+        Returns False when the frame is identical to the last one pushed.
+        """
+        metrics = self.metrics
+        start = perf_counter()
+        # Diff in the panel's native orientation so the damaged box maps
+        # straight onto the controller's address window.
+        frame = self.preprocess(image) if self.preprocess is not None else image
+        bbox = frame_bbox(self.last_frame, frame)
+        diffed = perf_counter()
+        metrics.record("diff", diffed - start)
+        if bbox is None:
+            metrics.unchanged += 1
+            return False
+        self.last_frame = frame
+        pooled = False
+        if self.prepare is None:
+            payload = image
+        elif shared is not None and self.share_key is not None:
+            # A shared payload can outlive this screen's buffer rotation.
+            payload = shared(self.share_key, lambda: self.packer(frame))
+        else:
+            payload = self.prepare(frame)
+            pooled = self.packer is not None
+        if self.prepare is not None:
+            metrics.record("prepare", perf_counter() - diffed)
+        self.deliver(payload, frame, bbox)
+        metrics.pushed += 1
+        self._account(image, frame, None if pooled or payload is image else payload)
+        return True
+
+    def _account(self, image, frame, payload):
+        """Record the frame memory held after a push in the screen metrics."""
+        held = image_bytes(image) + payload_bytes(payload) + self.buffers.bytes
+        if frame is not image:
+            held += image_bytes(frame)
+        self.metrics.frame_bytes = held
+        self.metrics.frame_peak_bytes = max(self.metrics.frame_peak_bytes, held)
+
+    def deliver(self, payload, frame, bbox):
+        """Hand a prepared payload to the transfer thread, or send it right away."""
+        if self.transfer is not None:
+            self.transfer.submit(payload, frame, bbox)
+            return
+        start = perf_counter()
+        self.send(payload, frame, bbox)
+        self.metrics.record("push", perf_counter() - start)
+
+    def flush(self):
+        """Wait until the last pushed frame is on the display."""
+        if self.transfer is not None:
+            self.transfer.flush()
+
+    def close(self):
+        """Finish pending transfers and stop the transfer thread."""
+        if self.transfer is not None:
+            self.transfer.stop()
+            # A Thread only starts once, keep the pipeline usable for show_image.
+            self.transfer = self._transfer_thread()
+
+    def _transfer_thread(self):
+        if not self.double_buffer:
+            return None
+        return TransferThread(self.screen_name, self.send, self.metrics)
+
+    def timed_transform(self, image, offload=None):
+        """transform() that records its latency as a derived-cache miss.
+
+        With a DCore.offload.TransformPool the work runs in a worker process.
+        """
+        start = perf_counter()
+        if offload is not None:
+            image = offload.transform(self.screen_name, image, self.transform_args)
+        else:
+            image = self.transform(image)
+        self.metrics.record("transform", perf_counter() - start)
+        self.metrics.cache_misses += 1
+        return image
+
+    def _compile_push(self):
+        """Pick the driver calls used for every frame of this screen.
+
+        Returns (prepare, send): prepare turns a transformed frame into the
+        driver payload (tri-color planes, getbuffer output) or is None when
+        the frame is sent as is; send(payload, frame, bbox) hands it over.
+        """
+        display = self.display
+        if self.epd:
+            full, partial = refresh_methods(display, tricolor=self.mode == "3")
+            if full is not None:
+                self.refresher = EpdRefresher.from_settings(
+                    full, partial, self.settings, self.screen_config)
+                return self._epd_prepare(), self.refresher.send
+        elif self.packer is not None:
+            return (lambda frame: self.packer(frame, self.buffers)), self._push_packed
+        else:
+            if hasattr(display, "display"):
+                full = display.display
+            elif hasattr(display, "show"):
+                full = display.show
+            else:
+                full = None
+            if full is not None:
+                if hasattr(display, "set_window") and hasattr(display, "data"):
+                    def send_region(image, frame, bbox):
+                        if bbox == (0, 0) + frame.size:
+                            full(image)
+                        else:
+                            self._push_luma_region(frame, bbox)
+                    return None, send_region
+                return None, lambda image, frame, bbox: full(image)
+        Log.log_warning(f"Display method not supported for screen '{self.screen_name}'.")
+        return None, lambda payload, frame, bbox: None
+
+    def _epd_prepare(self):
+        """Return the conversion of a frame into the e-paper driver payload."""
+        getbuffer = getattr(self.display, "getbuffer", None)
+        if self.mode == "3":
+            def planes(image):
+                img_bw, img_rw = split_tricolor(image, self.thresholds, self.dither)
+                if getbuffer is not None:
+                    return getbuffer(img_bw), getbuffer(img_rw)
+                return img_bw, img_rw
+            if getbuffer is None:
+                Log.log_warning(f"Display getbuffer method not supported for screen '{self.screen_name}'.")
+            return planes
+        if hasattr(self.display, "display") or hasattr(self.display, "show"):
+            return getbuffer
+        return None
+
+    def _packer(self):
+        """Return (packer, share_key) of the NumPy RGB565/RGB666 path, if used.
+
+        The packer turns a frame into the controller's pixel format, which
+        is then written straight to the address window; luma's per-frame
+        conversion and the list() of every byte are skipped.
+        COLMOD is set on every call: a reload can keep the driver while
+        switching its pixel format or turning the path off.
+        """
+        display = self.display
+        colmod = LUMA_COLMOD.get(type(display).__name__)
+        if self.epd or colmod is None or not hasattr(display, "data"):
+            return None, None
+        enabled = self.screen_config.get("fast_pack", self.settings.get("fast_pack", True))
+        if not enabled or load_numpy() is None:
+            # luma sends 3 bytes per pixel, put the controller back in that format.
+            self._command(0x3A, colmod)
+            return None, None
+        pixel_format = self.screen_config.get("pixel_format", self.settings.get("pixel_format", "rgb666"))
+        if pixel_format not in PACKERS:
+            raise ValueError(f"Unsupported pixel format: {pixel_format}")
+        self._command(0x3A, COLMOD_RGB565 if pixel_format == "rgb565" else colmod)
+        # Drivers taking a bgr argument swap the channels in MADCTL, others
+        # get them swapped here. invert is done by the controller (INVON).
+        bgr = self.settings.get("bgr", False) and "bgr" not in signature(type(display)).parameters
+        pack = PACKERS[pixel_format]
+        return (lambda frame, pool=None: pack(frame, bgr=bgr, pool=pool),
+                ("packed", pixel_format, bgr, getattr(display, "rotate", 0)))
+
+    def _push_packed(self, packed, frame, bbox):
+        """Write the damaged window of a packed frame in one bulk transfer."""
+        display = self.display
+        left, top, right, bottom = bbox
+        window = packed[top:bottom, left:right]
+        if hasattr(display, "apply_offsets"):
+            left, top, right, bottom = display.apply_offsets(bbox)
+        self._set_window(left, top, right, bottom)
+        # Full-width windows are contiguous and go out without a copy.
+        display.data(window.reshape(-1).data if window.flags.c_contiguous else window.tobytes())
+
+    def _command(self, cmd, *args):
+        """Send a controller command, padding its arguments where the board needs it."""
+        if type(self.display).__name__ in PADDED_COMMANDS:
+            args = [byte for arg in args for byte in (0, arg)]
+        self.display.command(cmd, *args)
+
+    def _set_window(self, left, top, right, bottom):
+        """Open the controller's address window for a memory write.
+
+        luma's ili9486 has no set_window, it writes the same CASET/RASET/RAMWR
+        sequence inside display().
+        """
+        if hasattr(self.display, "set_window"):
+            self.display.set_window(left, top, right, bottom)
+            return
+        self._command(0x2A, left >> 8, left & 0xFF, (right - 1) >> 8, (right - 1) & 0xFF)
+        self._command(0x2B, top >> 8, top & 0xFF, (bottom - 1) >> 8, (bottom - 1) & 0xFF)
+        self._command(0x2C)
+
+    def clear(self):
+        """Blank the screen through the packed path; False when the driver clears itself."""
+        if self.packer is None:
+            return False
+        blank = Image.new("RGB", self.display.size)
+        frame = self.preprocess(blank) if self.preprocess is not None else blank
+        self.last_frame = frame
+        self.deliver(self.packer(frame), frame, (0, 0) + frame.size)
+        return True
+
+    def _push_luma_region(self, frame, bbox):
+        """Send only the damaged window of a frame to a luma device."""
+        display = self.display
+        left, top, right, bottom = bbox
+        if hasattr(display, "apply_offsets"):
+            left, top, right, bottom = display.apply_offsets(bbox)
+        display.set_window(left, top, right, bottom)
+        display.data(frame.crop(bbox).convert("RGB").tobytes())
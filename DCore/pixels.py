@@ -0,0 +1,96 @@
+# numpy is imported by load_numpy() when an LCD first needs it, so
+# e-paper only setups do not pay for it at startup.
+np = None
+
+# Linux spidev refuses transfers larger than this module parameter.
+SPIDEV_BUFSIZ = "/sys/module/spidev/parameters/bufsiz"
+# Bus clocks luma.core's spi accepts (it asserts on any other value).
+SPI_SPEEDS_HZ = tuple(int(mhz * 1000000) for mhz in (0.5, 1, 2, 4, 8, 16, 20, 24, 28, 32, 36, 40, 44, 48, 50, 52))
+# COLMOD (0x3A) argument of the st7789/ili9486 16 bit interface format.
+COLMOD_RGB565 = 0x55
+# COLMOD argument luma's init sets, its 3 bytes per pixel format, per
+# controller the packed path writes to.
+LUMA_COLMOD = {"st7789": 0x06, "ili9486": 0x66}
+# Controllers behind a 16 bit shift register (the Waveshare 3.5" ILI9486
+# boards luma.lcd targets) take every command argument as a padded word.
+PADDED_COMMANDS = ("ili9486",)
+
+
+def load_numpy():
+    """Import numpy on first use; None when it is not installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:  # the packed LCD path is optional
+            return None
+        np = numpy
+    return np
+
+
+def _rgb_array(image, bgr):
+    if image.mode not in ("RGB", "RGBA", "RGBX"):
+        image = image.convert("RGB")
+    array = np.asarray(image)[..., :3]
+    return array[..., ::-1] if bgr else array
+
+
+def _buffer(pool, name, shape, dtype, depth=None):
+    """A buffer from a screen's BufferPool, or a new one without a pool."""
+    if pool is None:
+        return np.empty(shape, dtype)
+    return pool.get(name, shape, dtype, depth)
+
+
+def pack_rgb565(image, bgr=False, invert=False, pool=None):
+    """Pack an image into big-endian RGB565, a (height, width, 2) uint8 array.
+
+    With a pool the channels are combined in place in reused buffers.
+    """
+    array = _rgb_array(image, bgr)
+    shape = array.shape[:2]
+    packed = _buffer(pool, "rgb565_scratch", shape, np.uint16, 1)
+    channel = _buffer(pool, "rgb565_channel", shape, np.uint16, 1)
+    np.bitwise_and(array[..., 0], 0xF8, out=packed)
+    np.left_shift(packed, 8, out=packed)
+    np.bitwise_and(array[..., 1], 0xFC, out=channel)
+    np.left_shift(channel, 3, out=channel)
+    np.bitwise_or(packed, channel, out=packed)
+    np.right_shift(array[..., 2], 3, out=channel)
+    np.bitwise_or(packed, channel, out=packed)
+    if invert:
+        np.bitwise_xor(packed, 0xFFFF, out=packed)
+    out = _buffer(pool, "rgb565", shape, ">u2")
+    out[...] = packed
+    return out.view(np.uint8).reshape(shape + (2,))
+
+
+def pack_rgb666(image, bgr=False, invert=False, pool=None):
+    """Pack an image into RGB666, one byte per channel with the top 6 bits used."""
+    array = _rgb_array(image, bgr)
+    out = _buffer(pool, "rgb666", array.shape, np.uint8)
+    if invert:
+        np.subtract(255, array, out=out)
+    else:
+        out[...] = array
+    return out
+
+
+PACKERS = {
+    "rgb565": pack_rgb565,
+    "rgb666": pack_rgb666,
+}
+
+
+def spi_bus_speed(speed_hz):
+    """The fastest clock luma's spi accepts that does not exceed speed_hz."""
+    return max((speed for speed in SPI_SPEEDS_HZ if speed <= speed_hz), default=SPI_SPEEDS_HZ[0])
+
+
+def spi_transfer_size(default=4096):
+    """Largest single spidev transfer, so bulk writes use as few ioctls as possible."""
+    try:
+        with open(SPIDEV_BUFSIZ) as file:
+            return int(file.read())
+    except (OSError, ValueError):
+        return default
@@ -0,0 +1,76 @@
+import time
+
+
+class FrameScheduler:
+    """Paces a render loop on absolute deadlines of a monotonic clock.
+
+    When a frame overruns its slot the missed slots are dropped instead of
+    being rendered late, so latency never builds up.
+    """
+
+    def __init__(self, fps, clock=time.monotonic):
+        self.target_fps = fps
+        self.interval = 1 / fps
+        self.clock = clock
+        self.next_deadline = None
+        self.dropped = 0
+        self.frames = 0
+        self.pushed = 0
+        # Pushed frames and loop iterations per second over the last window;
+        # iterations include the ones that found nothing new to push.
+        self.achieved_fps = 0.0
+        self.loop_fps = 0.0
+        self._window_start = None
+        self._window_frames = 0
+        self._window_pushed = 0
+
+    def frame_done(self, pushed=True):
+        """Account for one finished loop iteration."""
+        now = self.clock()
+        self.frames += 1
+        self.pushed += pushed
+        if self._window_start is None:
+            # The first iteration only opens the window, rates count the ones after it.
+            self._window_start = now
+            return
+        self._window_frames += 1
+        self._window_pushed += pushed
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.achieved_fps = self._window_pushed / elapsed
+            self.loop_fps = self._window_frames / elapsed
+            self._window_start = now
+            self._window_frames = 0
+            self._window_pushed = 0
+
+    def wait(self, stop_event):
+        """Sleep until the next deadline, dropping the slots already missed."""
+        now = self.clock()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        self.next_deadline += self.interval
+        if now > self.next_deadline:
+            missed = int((now - self.next_deadline) / self.interval) + 1
+            self.dropped += missed
+            self.next_deadline += missed * self.interval
+        stop_event.wait(self.next_deadline - now)
+
+    def throttle(self, stop_event):
+        """Keep at least one interval since the last deadline without counting drops."""
+        now = self.clock()
+        if self.next_deadline is not None and now < self.next_deadline + self.interval:
+            self.next_deadline += self.interval
+            stop_event.wait(self.next_deadline - now)
+        else:
+            self.next_deadline = now
+
+    def stats(self):
+        """Return the achieved (pushed) versus target frame rate, the loop rate and the drop count."""
+        return {
+            "target_fps": self.target_fps,
+            "achieved_fps": round(self.achieved_fps, 2),
+            "loop_fps": round(self.loop_fps, 2),
+            "frames": self.frames,
+            "pushed": self.pushed,
+            "dropped": self.dropped,
+        }
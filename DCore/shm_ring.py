@@ -0,0 +1,139 @@
+import struct
+from multiprocessing import shared_memory
+
+MAGIC = b"DCFR"
+LAYOUT_VERSION = 2
+
+# magic, layout version, slot count, max width, max height, slot data size,
+# frame mode, latest sequence (8 byte aligned)
+HEADER = struct.Struct("<4sHHIII12sQ")
+# sequence, width, height, dirty left, top, right, bottom, mode
+SLOT = struct.Struct("<QIIIIII16s")
+ALIGN = 64
+
+BYTES_PER_PIXEL = {"L": 1, "P": 1, "I;16": 2, "RGB": 3, "RGBA": 4, "RGBX": 4, "CMYK": 4}
+
+
+def _aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+def frame_size(width, height, mode):
+    """Return the byte size of a raw frame."""
+    if mode not in BYTES_PER_PIXEL:
+        raise ValueError(f"Unsupported frame mode: {mode}")
+    return width * height * BYTES_PER_PIXEL[mode]
+
+
+def _attach(name):
+    """Attach to an existing segment without handing it to the resource tracker."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers every attach and unlinks the segment when
+        # this process exits, pulling it from under the other side.
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class FrameRing:
+    """Ring of raw frame slots in a POSIX shared-memory segment.
+
+    One producer writes frames, DCore reads the newest one. A slot is only
+    published (global sequence bumped) after its pixels and header are
+    written, and readers check the slot sequence against the global one to
+    detect a slot that is being overwritten.
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        magic, version, self.slots, self.width, self.height, self.slot_size, mode, _ = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            shm.close()
+            raise ValueError(f"Shared memory '{shm.name}' is not a DCore frame ring")
+        # Mode the ring was sized for, producers convert their frames to it.
+        self.mode = mode.rstrip(b"\0").decode()
+        self.slot_stride = _aligned(SLOT.size) + _aligned(self.slot_size)
+
+    @classmethod
+    def create(cls, name, width, height, mode="RGBA", slots=3):
+        """Create a ring sized for frames up to width x height in mode."""
+        slot_size = frame_size(width, height, mode)
+        stride = _aligned(SLOT.size) + _aligned(slot_size)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_aligned(HEADER.size) + slots * stride)
+        HEADER.pack_into(shm.buf, 0, MAGIC, LAYOUT_VERSION, slots, width, height, slot_size, mode.encode(), 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a ring created by another process."""
+        return cls(_attach(name))
+
+    @classmethod
+    def open(cls, name, width, height, mode="RGBA", slots=3):
+        """Attach to the ring if it exists, create it otherwise."""
+        try:
+            return cls.attach(name)
+        except FileNotFoundError:
+            return cls.create(name, width, height, mode, slots)
+
+    @property
+    def sequence(self):
+        """Sequence number of the newest published frame, 0 before the first one."""
+        return struct.unpack_from("<Q", self.shm.buf, HEADER.size - 8)[0]
+
+    def _slot_offset(self, sequence):
+        return _aligned(HEADER.size) + (sequence % self.slots) * self.slot_stride
+
+    def write(self, data, width, height, mode, dirty=None):
+        """Publish one raw frame, return its sequence number."""
+        size = frame_size(width, height, mode)
+        if size > self.slot_size or len(data) != size:
+            raise ValueError(f"Frame of {len(data)} bytes does not fit a {self.slot_size} byte slot")
+        sequence = self.sequence + 1
+        offset = self._slot_offset(sequence)
+        data_offset = offset + _aligned(SLOT.size)
+        # Sequence 0 marks the slot as being written.
+        struct.pack_into("<Q", self.shm.buf, offset, 0)
+        self.shm.buf[data_offset:data_offset + size] = data
+        left, top, right, bottom = dirty or (0, 0, width, height)
+        SLOT.pack_into(self.shm.buf, offset, sequence, width, height, left, top, right, bottom, mode.encode())
+        struct.pack_into("<Q", self.shm.buf, HEADER.size - 8, sequence)
+        return sequence
+
+    def read(self, sequence=None):
+        """Return (sequence, width, height, mode, dirty, memoryview) of a published slot.
+
+        Returns None when the slot is being overwritten.
+        """
+        if sequence is None:
+            sequence = self.sequence
+        if not sequence:
+            return None
+        offset = self._slot_offset(sequence)
+        slot_sequence, width, height, left, top, right, bottom, mode = SLOT.unpack_from(self.shm.buf, offset)
+        if slot_sequence != sequence:
+            return None
+        mode = mode.rstrip(b"\0").decode()
+        data_offset = offset + _aligned(SLOT.size)
+        data = self.shm.buf[data_offset:data_offset + frame_size(width, height, mode)]
+        return sequence, width, height, mode, (left, top, right, bottom), data
+
+    def is_current(self, sequence):
+        """True while the slot of sequence has not been reused by the producer."""
+        offset = self._slot_offset(sequence)
+        return struct.unpack_from("<Q", self.shm.buf, offset)[0] == sequence
+
+    def close(self):
+        """Detach from the ring, removing it if this process created it."""
+        try:
+            self.shm.close()
+        except BufferError:
+            # Frames wrapping a slot are still referenced somewhere, the
+            # mapping is released together with them.
+            pass
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,69 @@
+from threading import Thread, Condition
+from time import perf_counter
+import DCore.log as Log
+
+
+class TransferThread(Thread):
+    """Writes frames to a display while the next one is being rendered.
+
+    Two buffers: the frame on the bus and the one waiting for it. submit()
+    fills the waiting buffer and only blocks while the previous submission
+    has not been picked up yet, so a transform overlaps the transfer of the
+    frame before it and the loop runs at the speed of the slower stage.
+    """
+
+    def __init__(self, screen_name, send, metrics=None):
+        super().__init__(name=f"DCore-{screen_name}-transfer", daemon=True)
+        self.screen_name = screen_name
+        self.send = send
+        self.metrics = metrics
+        self._cond = Condition()
+        self._pending = None  # (payload, frame, bbox) waiting for the bus
+        self._busy = False
+        self._stopped = False
+
+    def submit(self, payload, frame, bbox):
+        """Queue a frame for transfer, waiting for the waiting buffer to free up."""
+        with self._cond:
+            if not self.is_alive() and not self._stopped:
+                self.start()
+            self._cond.wait_for(lambda: self._pending is None or self._stopped)
+            if self._stopped:
+                return
+            self._pending = (payload, frame, bbox)
+            self._cond.notify_all()
+
+    def flush(self):
+        """Block until every submitted frame is on the display."""
+        with self._cond:
+            self._cond.wait_for(lambda: (self._pending is None and not self._busy) or self._stopped)
+
+    def run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._stopped)
+                if self._stopped:
+                    return
+                payload, frame, bbox = self._pending
+                self._pending = None
+                self._busy = True
+                self._cond.notify_all()
+            start = perf_counter()
+            try:
+                self.send(payload, frame, bbox)
+            except Exception as e:
+                Log.log_error(f"Screen '{self.screen_name}' transfer failed: {e!r}")
+            if self.metrics is not None:
+                self.metrics.record("push", perf_counter() - start)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def stop(self):
+        """Finish the frames already submitted, then end the thread."""
+        self.flush()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self.is_alive():
+            self.join()
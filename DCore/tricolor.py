@@ -0,0 +1,30 @@
+from functools import lru_cache
+from DCore.dither import dither_tricolor
+
+DEFAULT_THRESHOLDS = (85, 170)
+
+
+@lru_cache(maxsize=8)
+def tricolor_tables(low, high):
+    """Build the grayscale lookup tables for the black and red planes."""
+    black = [0 if gray < low else 255 for gray in range(256)]
+    red = [0 if low <= gray <= high else 255 for gray in range(256)]
+    return black, red
+
+
+def split_tricolor(image, thresholds=DEFAULT_THRESHOLDS, dither="threshold"):
+    """Split an image into black-and-white and red-and-white planes.
+
+    Pixels darker than the low threshold go to the black plane, pixels
+    between both thresholds (inclusive) go to the red plane, the rest
+    stay white. Any other dither than "threshold" spreads the gray levels
+    over black, red and white with DCore.dither instead.
+    """
+    low, high = thresholds
+    grayscale = image.convert('L')
+    if dither != "threshold":
+        return dither_tricolor(grayscale, (int(low), int(high)), dither)
+    black, red = tricolor_tables(int(low), int(high))
+    img_bw = grayscale.point(black, '1')
+    img_rw = grayscale.point(red).convert('RGB')
+    return img_bw, img_rw
@@ -0,0 +1,88 @@
+import mmap
+import os
+from collections import deque
+from PIL import Image
+from DCore.shm_ring import FrameRing, BYTES_PER_PIXEL
+
+OUTPUTS = ("memory", "png", "raw", "shm")
+# Screen config keys that override DISPLAY_SETTINGS for virtual displays.
+VIRTUAL_KEYS = ("width", "height", "mode", "output", "path", "shm_name", "history", "slots", "fps")
+
+
+class VirtualDisplay:
+    """Display without hardware, driven through the same pipeline as a luma device.
+
+    Pushed frames are kept in memory (the last `history` ones), written
+    atomically to a PNG, copied into a raw memory-mapped file, or published
+    to a shared-memory frame ring a "received" input or a preview process
+    can read.
+    """
+
+    def __init__(self, width, height, mode="RGB", output="memory", path=None,
+                 shm_name=None, history=1, slots=3):
+        if output not in OUTPUTS:
+            raise ValueError(f"Unsupported virtual display output: {output}")
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+        self.mode = mode
+        self.output = output
+        self.path = path
+        self.frames = deque(maxlen=history)
+        self.frame_count = 0
+        self._mmap = None
+        self._ring = None
+        # Frame rings and raw files hold 8 bit or wider pixels.
+        self._raw_mode = mode if mode in BYTES_PER_PIXEL else "L"
+        if output in ("png", "raw") and not path:
+            raise ValueError(f"Virtual display output {output} needs a path")
+        if output == "raw":
+            size = width * height * BYTES_PER_PIXEL[self._raw_mode]
+            with open(path, "a+b") as file:
+                file.truncate(size)
+                self._mmap = mmap.mmap(file.fileno(), size)
+        elif output == "shm":
+            self._ring = FrameRing.open(shm_name or "dcore_virtual", width, height, self._raw_mode, slots)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings["width"], settings["height"], settings.get("mode", "RGB"),
+                   settings.get("output", "memory"), settings.get("path"), settings.get("shm_name"),
+                   settings.get("history", 1), settings.get("slots", 3))
+
+    def display(self, image):
+        """Record one frame."""
+        if image.mode != self.mode:
+            image = image.convert(self.mode)
+        self.frames.append(image)
+        self.frame_count += 1
+        if self.output == "png":
+            tmp_path = f"{self.path}.tmp"
+            image.save(tmp_path, "PNG")
+            os.replace(tmp_path, self.path)
+        elif self.output == "raw":
+            self._mmap[:] = self._raw(image)
+        elif self.output == "shm":
+            self._ring.write(self._raw(image), self.width, self.height, self._raw_mode)
+
+    def _raw(self, image):
+        if image.mode != self._raw_mode:
+            image = image.convert(self._raw_mode)
+        return image.tobytes()
+
+    @property
+    def last_frame(self):
+        """The most recent frame, or None before the first push."""
+        return self.frames[-1] if self.frames else None
+
+    def clear(self):
+        self.display(Image.new(self.mode, self.size))
+
+    def cleanup(self):
+        """Release the mmap or shared memory of the output."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
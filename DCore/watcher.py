@@ -0,0 +1,194 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from threading import Thread, Lock, Event
+import DCore.log as Log
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")
+
+
+def _call(callback, path):
+    """Run a watch callback; one failing callback must not end the shared watcher thread."""
+    try:
+        callback()
+    except Exception as e:
+        Log.log_error(f"Watch callback for {path} failed: {e!r}")
+
+
+class InotifyWatcher:
+    """Wakes callbacks when a file is fully written or renamed into place.
+
+    Watches the parent directory so atomic replace-by-rename producers are
+    seen, and filters events by file name so writes to neighbouring files
+    never wake a screen.
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        self._lock = Lock()
+        self._dirs = {}        # wd -> directory
+        self._wds = {}         # directory -> wd
+        self._callbacks = {}   # (directory, name) -> [callback]
+        self._thread = Thread(target=self._run, name="DCore-inotify", daemon=True)
+        self._thread.start()
+
+    def watch(self, path, callback):
+        """Call callback() whenever path is closed after writing or moved into place."""
+        directory, name = os.path.split(os.path.abspath(path))
+        with self._lock:
+            if directory not in self._wds:
+                wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+                if wd < 0:
+                    errno = ctypes.get_errno()
+                    raise OSError(errno, os.strerror(errno), directory)
+                self._wds[directory] = wd
+                self._dirs[wd] = directory
+            self._callbacks.setdefault((directory, name), []).append(callback)
+        return (directory, name, callback)
+
+    def unwatch(self, handle):
+        """Stop calling a callback registered with watch()."""
+        directory, name, callback = handle
+        with self._lock:
+            callbacks = self._callbacks.get((directory, name), [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._callbacks.pop((directory, name), None)
+            if not any(key[0] == directory for key in self._callbacks):
+                wd = self._wds.pop(directory, None)
+                if wd is not None:
+                    self._dirs.pop(wd, None)
+                    self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _run(self):
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        poller.register(self._wake_r, select.POLLIN)
+        while True:
+            # No timeout: the thread only wakes up on filesystem events.
+            for fd, _ in poller.poll():
+                if fd == self._wake_r:
+                    return
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self._dispatch(data)
+
+    def _dispatch(self, data):
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            with self._lock:
+                if mask & IN_IGNORED:
+                    directory = self._dirs.pop(wd, None)
+                    self._wds.pop(directory, None)
+                    continue
+                directory = self._dirs.get(wd)
+                callbacks = list(self._callbacks.get((directory, os.fsdecode(name)), ()))
+            for callback in callbacks:
+                _call(callback, os.path.join(directory or "", os.fsdecode(name)))
+
+    def close(self):
+        """Stop the watcher thread and release the inotify descriptor."""
+        os.write(self._wake_w, b"\0")
+        self._thread.join()
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that compares file stats at a fixed interval."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self._lock = Lock()
+        self._paths = {}   # path -> [last stat key, [callback]]
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name="DCore-poll", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _stat_key(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def watch(self, path, callback):
+        """Call callback() whenever the stat of path changes."""
+        with self._lock:
+            entry = self._paths.setdefault(path, [self._stat_key(path), []])
+            entry[1].append(callback)
+        return (path, callback)
+
+    def unwatch(self, handle):
+        """Stop calling a callback registered with watch()."""
+        path, callback = handle
+        with self._lock:
+            entry = self._paths.get(path)
+            if entry and callback in entry[1]:
+                entry[1].remove(callback)
+                if not entry[1]:
+                    del self._paths[path]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                entries = list(self._paths.items())
+            for path, entry in entries:
+                key = self._stat_key(path)
+                if key != entry[0]:
+                    entry[0] = key
+                    for callback in list(entry[1]):
+                        _call(callback, path)
+
+    def close(self):
+        """Stop the polling thread."""
+        self._stop.set()
+        self._thread.join()
+
+
+_inotify = None
+_polling = None
+_watchers_lock = Lock()
+
+
+def watch_file(path, callback, backend="auto", interval=0.05):
+    """Watch path with inotify when possible, else by polling.
+
+    Returns (watcher, handle) for a later watcher.unwatch(handle).
+    """
+    global _inotify, _polling
+    with _watchers_lock:
+        if backend in ("auto", "inotify"):
+            try:
+                if _inotify is None:
+                    _inotify = InotifyWatcher()
+                return _inotify, _inotify.watch(path, callback)
+            except (OSError, AttributeError) as e:
+                # No inotify (non-Linux, missing directory, watch limit reached).
+                if backend == "inotify":
+                    raise
+                Log.log_event(f"inotify unavailable for {path} ({e}), polling instead")
+        if _polling is None:
+            _polling = PollingWatcher(interval)
+        _polling.interval = min(_polling.interval, interval)
+        return _polling, _polling.watch(path, callback)
@@ -0,0 +1,54 @@
+from threading import Thread, Event
+from DCore.scheduler import FrameScheduler
+import DCore.log as Log
+
+
+class ScreenWorker(Thread):
+    """Render loop of a single screen, paced by that screen's own fps.
+
+    While frames keep changing the loop runs on the fps deadlines; once a
+    pass pushes nothing it sleeps on the input until it changes, so an idle
+    screen does not wake up at all. With on_change it sleeps on the input
+    after every pass.
+    """
+
+    # Pause after a driver error so a broken panel does not spin the CPU.
+    ERROR_BACKOFF = 1.0
+    # How often the achieved frame rate is written to the log.
+    REPORT_INTERVAL = 10.0
+
+    def __init__(self, manager, screen_name, fps, on_change=False):
+        super().__init__(name=f"DCore-{screen_name}", daemon=True)
+        self.manager = manager
+        self.screen_name = screen_name
+        self.on_change = on_change
+        self.scheduler = FrameScheduler(fps)
+        self.stop_event = Event()
+
+    def run(self):
+        last_report = self.scheduler.clock()
+        while not self.stop_event.is_set():
+            try:
+                pushed = self.manager.update_screen(self.screen_name)
+            except Exception as e:
+                # Keep the other screens running, retry this one later.
+                Log.log_error(f"Screen '{self.screen_name}' failed: {e!r}")
+                self.stop_event.wait(self.ERROR_BACKOFF)
+                continue
+            self.scheduler.frame_done(pushed)
+            now = self.scheduler.clock()
+            if now - last_report >= self.REPORT_INTERVAL:
+                last_report = now
+                stats = self.scheduler.stats()
+                Log.log_event(f"Screen '{self.screen_name}': {stats['achieved_fps']}/{stats['target_fps']} fps, "
+                              f"{stats['loop_fps']} loops/s, {stats['dropped']} dropped")
+            if self.on_change or not pushed:
+                # Sleep until the input changes, but never exceed the panel's fps.
+                self.manager.wait_for_input(self.screen_name, self.stop_event)
+                self.scheduler.throttle(self.stop_event)
+            else:
+                self.scheduler.wait(self.stop_event)
+
+    def stop(self):
+        """Ask the worker to exit after its current frame."""
+        self.stop_event.set()
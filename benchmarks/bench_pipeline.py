@@ -0,0 +1,75 @@
+"""Per-frame overhead of the screen render path, before and after ScreenPipeline.
+
+Runs without hardware: drivers are replaced by a no-op display so only
+DCore's own work is measured.
+
+    python benchmarks/bench_pipeline.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PIL import Image
+from DCore.display_config import DISPLAY_SETTINGS
+from DCore.pipeline import ScreenPipeline
+
+FRAMES = 200
+PROFILES = ["displayhatmini", "waveshare_3.5_clone", "waveshare_2.7a", "luma_oled_spi_128x64"]
+
+
+class NullLCD:
+    def preprocess(self, image):
+        return image
+
+    def display(self, image):
+        pass
+
+
+class EPDNull:
+    def display_partial_frame(self, image, x, y, h, w, fast=False):
+        pass
+
+
+def legacy_transform(image, settings, epd):
+    """The show_image transform as it was before the pipeline: one copy per step."""
+    settings = DISPLAY_SETTINGS.get(settings, {})
+    width = settings.get("width", image.width)
+    height = settings.get("height", image.height)
+    target_mode = settings.get("mode", "RGB")
+    if settings.get("inverse", False):
+        image = image.transpose(Image.FLIP_LEFT_RIGHT)
+    if epd:
+        rotate = settings.get("rotate", 0)
+        if rotate:
+            image = image.rotate(90 * rotate, expand=True)
+    return image.resize((width, height)).convert(target_mode)
+
+
+def bench(label, func, frames):
+    start = time.perf_counter()
+    for image in frames:
+        func(image)
+    return (time.perf_counter() - start) / len(frames) * 1000
+
+
+def main():
+    print(f"{'profile':24} {'source':>10} {'legacy ms':>10} {'pipeline ms':>12}")
+    for name in PROFILES:
+        settings = DISPLAY_SETTINGS[name]
+        epd = settings["driver"] == "waveshare_epd"
+        display = EPDNull() if epd else NullLCD()
+        pipeline = ScreenPipeline("bench", {}, settings, display)
+        width, height = settings["width"], settings["height"]
+        if pipeline.rotate in (1, 3):
+            width, height = height, width
+        for label, size in (("native", (width, height)), ("2x", (width * 2, height * 2))):
+            frames = [Image.new("RGB", size, (i % 256, 0, 0)) for i in range(FRAMES)]
+            legacy = bench(label, lambda image: legacy_transform(image, name, epd), frames)
+            compiled = bench(label, lambda image: pipeline.transform(image), frames)
+            print(f"{name:24} {label:>10} {legacy:10.3f} {compiled:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Simulated hardware timing shared by the fake drivers.
+
+Bus transfers sleep for the time the bytes would take on the wire at the
+configured clock; e-paper refreshes sleep for a typical panel latency.
+EPD_SCALE shortens the (multi-second) refreshes so a full run stays quick.
+"""
+import time
+
+TIME_SCALE = 1.0
+EPD_SCALE = 0.05
+# Fixed cost of one spidev ioctl, including the D/C GPIO toggle.
+TRANSFER_OVERHEAD = 20e-6
+bus_time = 0.0
+
+
+def transfer(nbytes, speed_hz, chunk=4096):
+    """Block for the duration of an nbytes bus transfer at speed_hz."""
+    global bus_time
+    chunks = max(1, -(-nbytes // chunk))
+    seconds = (nbytes * 8 / speed_hz + chunks * TRANSFER_OVERHEAD) * TIME_SCALE
+    bus_time += seconds
+    time.sleep(seconds)
+
+
+def refresh(seconds):
+    """Block for an e-paper refresh of the given real-panel duration."""
+    time.sleep(seconds * EPD_SCALE)
@@ -0,0 +1,33 @@
+class device:
+    """Minimal stand-in for luma.core.device.device."""
+
+    bytes_per_pixel = 3
+
+    def __init__(self, serial_interface=None, width=128, height=64, rotate=0, mode="RGB", **kwargs):
+        self._serial_interface = serial_interface
+        self._w, self._h = width, height
+        self.rotate = rotate
+        self.mode = mode
+        self.width, self.height = (height, width) if rotate % 2 else (width, height)
+        self.size = (self.width, self.height)
+
+    def preprocess(self, image):
+        if self.rotate == 0:
+            return image
+        return image.rotate(self.rotate * -90, expand=True).crop((0, 0, self._w, self._h))
+
+    def command(self, cmd, *args):
+        self._serial_interface.command(cmd, *args)
+
+    def data(self, data):
+        self._serial_interface.data(data)
+
+    def display(self, image):
+        image = self.preprocess(image)
+        self.data(bytes(int(image.width * image.height * self.bytes_per_pixel)))
+
+    def clear(self):
+        self.data(bytes(int(self._w * self._h * self.bytes_per_pixel)))
+
+    def show(self):
+        self.command(0x29)
@@ -0,0 +1,28 @@
+import _fakesim
+
+# Same constructor signatures and checks as luma.core.interface.serial.
+
+
+class spi:
+    def __init__(self, spi=None, gpio=None, port=0, device=0, bus_speed_hz=8000000, transfer_size=4096,
+                 gpio_DC=24, gpio_RST=25, spi_mode=None, reset_hold_time=0, reset_release_time=0, **kwargs):
+        assert bus_speed_hz in [mhz * 1000000 for mhz in [0.5, 1, 2, 4, 8, 16, 20, 24, 28, 32, 36, 40, 44, 48, 50, 52]]
+        self.speed = bus_speed_hz
+        self.transfer_size = transfer_size
+
+    def command(self, *cmd):
+        _fakesim.transfer(len(cmd), self.speed, self.transfer_size)
+
+    def data(self, data):
+        _fakesim.transfer(len(data), self.speed, self.transfer_size)
+
+
+class i2c:
+    def __init__(self, bus=None, port=1, address=0x3C):
+        self.speed = 400000
+
+    def command(self, *cmd):
+        _fakesim.transfer(len(cmd), self.speed, 32)
+
+    def data(self, data):
+        _fakesim.transfer(len(data), self.speed, 32)
@@ -0,0 +1,28 @@
+from luma._fakedevice import device
+
+
+class st7789(device):
+    def __init__(self, serial_interface=None, width=240, height=240, rotate=0, **kwargs):
+        super().__init__(serial_interface, width, height, rotate, "RGB")
+
+    def set_window(self, x1, y1, x2, y2):
+        self.command(0x2A, x1 >> 8, x1 & 0xFF, (x2 - 1) >> 8, (x2 - 1) & 0xFF)
+        self.command(0x2B, y1 >> 8, y1 & 0xFF, (y2 - 1) >> 8, (y2 - 1) & 0xFF)
+        self.command(0x2C)
+
+    def display(self, image):
+        self.set_window(0, 0, self._w, self._h)
+        super().display(image)
+
+
+class ili9486(device):
+    def __init__(self, serial_interface=None, width=320, height=480, rotate=0, **kwargs):
+        super().__init__(serial_interface, width, height, rotate, "RGB")
+        self.command(0x3A, 0x00, 0x66)
+
+    def display(self, image):
+        # No set_window: the padded window commands are part of display().
+        self.command(0x2A, 0, 0, 0, 0, 0, (self._w - 1) >> 8, 0, (self._w - 1) & 0xFF)
+        self.command(0x2B, 0, 0, 0, 0, 0, (self._h - 1) >> 8, 0, (self._h - 1) & 0xFF)
+        self.command(0x2C)
+        super().display(image)
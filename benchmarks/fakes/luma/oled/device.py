@@ -0,0 +1,8 @@
+from luma._fakedevice import device
+
+
+class sh1106(device):
+    bytes_per_pixel = 1 / 8
+
+    def __init__(self, serial_interface=None, width=128, height=64, rotate=0, **kwargs):
+        super().__init__(serial_interface, width, height, rotate, "1")
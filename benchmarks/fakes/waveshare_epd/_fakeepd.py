@@ -0,0 +1,70 @@
+from PIL import Image
+import _fakesim
+
+
+class EPDBase:
+    """Stand-in for a Waveshare EPD class, native orientation is portrait."""
+
+    width = 122
+    height = 250
+    FULL_REFRESH = 2.0
+    SPI_SPEED = 4000000
+
+    def init(self, *args):
+        return 0
+
+    def getbuffer(self, image):
+        if image.size not in ((self.width, self.height), (self.height, self.width)):
+            raise ValueError(f"Image of {image.size} does not fit a {self.width}x{self.height} panel")
+        return bytearray(image.convert("1").tobytes())
+
+    def _send(self, buffer):
+        _fakesim.transfer(len(buffer), self.SPI_SPEED)
+
+    def display(self, *buffers):
+        for buffer in buffers:
+            self._send(buffer)
+        _fakesim.refresh(self.FULL_REFRESH)
+
+    def Clear(self, color=0xFF):
+        self._send(bytes(self.width * self.height // 8))
+        _fakesim.refresh(self.FULL_REFRESH)
+
+    def sleep(self):
+        pass
+
+
+class EPDPartial(EPDBase):
+    """Panel with a partial refresh LUT (2.13 V2 style init modes)."""
+
+    FULL_UPDATE = 0
+    PART_UPDATE = 1
+    PARTIAL_REFRESH = 0.3
+
+    def displayPartial(self, buffer):
+        self._send(buffer)
+        _fakesim.refresh(self.PARTIAL_REFRESH)
+
+
+class EPDSmart:
+    """Stand-in for the elad661 rpi_epd2in7 driver (partial refresh, no getbuffer)."""
+
+    width = 176
+    height = 264
+    PARTIAL_REFRESH = 0.3
+    FULL_REFRESH = 6.0
+    SPI_SPEED = 2000000
+
+    def init(self):
+        self._last = Image.new("1", (self.width, self.height), 255)
+
+    def smart_update(self, image):
+        self.display_frame(image)
+
+    def display_frame(self, image):
+        _fakesim.transfer(self.width * self.height // 8, self.SPI_SPEED)
+        _fakesim.refresh(self.FULL_REFRESH)
+
+    def display_partial_frame(self, image, x, y, h, w, fast=False):
+        _fakesim.transfer(w * h // 8, self.SPI_SPEED)
+        _fakesim.refresh(self.PARTIAL_REFRESH if fast else self.PARTIAL_REFRESH * 2)
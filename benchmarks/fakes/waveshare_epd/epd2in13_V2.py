@@ -0,0 +1,6 @@
+from waveshare_epd._fakeepd import EPDPartial
+
+
+class EPD(EPDPartial):
+    width = 122
+    height = 250
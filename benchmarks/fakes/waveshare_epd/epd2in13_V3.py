@@ -0,0 +1,6 @@
+from waveshare_epd._fakeepd import EPDBase
+
+
+class EPD(EPDBase):
+    width = 122
+    height = 250
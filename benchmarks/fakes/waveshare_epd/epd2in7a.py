@@ -0,0 +1,5 @@
+from waveshare_epd._fakeepd import EPDSmart
+
+
+class EPD(EPDSmart):
+    pass
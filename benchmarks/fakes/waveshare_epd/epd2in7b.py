@@ -0,0 +1,7 @@
+from waveshare_epd._fakeepd import EPDBase
+
+
+class EPD(EPDBase):
+    width = 176
+    height = 264
+    FULL_REFRESH = 15.0
@@ -0,0 +1,169 @@
+"""Hardware-free throughput benchmark of the DCore render path.
+
+Every entry of DISPLAY_SETTINGS is initialized through the normal
+DisplayManager.init_display path, but against the fake luma, waveshare_epd
+and gpiozero modules in benchmarks/fakes. The fakes block for the time an
+SPI transfer would take at the profile's spi_speed_hz (rounded down to a
+clock luma's spi accepts, as on hardware) and for a typical
+e-paper refresh (scaled by --epd-scale), so the numbers approximate a real
+panel on any Linux box.
+
+    python benchmarks/run.py --output bench.json
+    python benchmarks/run.py --profiles displayhatmini,waveshare_2.7_tri
+
+Frames go through DisplayManager.update_screen, the path a screen worker
+runs. Reported per profile: achieved fps, CPU time per frame and the
+per-stage latency (decode, transform, diff, tricolor/getbuffer, push)
+the screen's own metrics recorded.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# The fakes shadow any real luma/waveshare_epd/gpiozero install.
+sys.path.insert(0, os.path.join(HERE, "fakes"))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import yaml
+from PIL import Image, ImageDraw
+import _fakesim
+from DCore.__main__ import DisplayManager
+from DCore.display_config import DISPLAY_SETTINGS
+from DCore.metrics import BUCKETS, STAGES
+
+
+def source_frames(size, count=8):
+    """Encode a short PNG loop with a moving box, like a status screen."""
+    frames = []
+    for i in range(count):
+        image = Image.new("RGB", size, (255, 255, 255))
+        draw = ImageDraw.Draw(image)
+        step = size[0] // count
+        draw.rectangle((i * step, size[1] // 3, i * step + step, size[1] // 3 * 2), fill=(0, 0, 0))
+        draw.text((4, 4), f"frame {i}", fill=(200, 0, 0))
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def summarize(histogram):
+    """Mean and the bucket bounds holding the median and 95th percentile of a stage."""
+    def bound(fraction):
+        seen = 0
+        for le, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+            seen += count
+            if seen >= fraction * histogram.count:
+                return round(le * 1000, 3)
+        return None
+    if not histogram.count:
+        return {"count": 0, "mean_ms": 0.0, "p50_le_ms": None, "p95_le_ms": None}
+    return {
+        "count": histogram.count,
+        "mean_ms": round(histogram.total / histogram.count * 1000, 3),
+        "p50_le_ms": bound(0.5),
+        "p95_le_ms": bound(0.95),
+    }
+
+
+def run_profile(name, frames, source_size, workdir):
+    path = os.path.join(workdir, f"{name}.png")
+    pngs = source_frames(source_size)
+    with open(path, "wb") as file:
+        file.write(pngs[-1])
+    config_path = os.path.join(workdir, f"{name}.yaml")
+    with open(config_path, "w") as file:
+        yaml.safe_dump({
+            # The e-paper refresher still picks full or partial refreshes, but
+            # frames go out back to back instead of being coalesced.
+            "screens": {"bench": {"name": name, "default_input": "bench",
+                                  "coalesce": 0, "min_refresh_interval": 0}},
+            "frame_inputs": {"bench": {"type": "retrieved", "path": path}},
+        }, file)
+
+    start = time.perf_counter()
+    manager = DisplayManager(config_path)
+    init_s = time.perf_counter() - start
+    pipeline = manager.pipelines["bench"]
+    frame_input = manager.inputs["bench"]
+
+    # Frames go through update_screen like a screen worker's, stage latencies
+    # come from the screen's own metrics.
+    bus_start = _fakesim.bus_time
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(frames):
+        with open(path + ".tmp", "wb") as file:
+            file.write(pngs[i % len(pngs)])
+        os.replace(path + ".tmp", path)
+        frame_input.notify()
+        manager.update_screen("bench")
+    pipeline.flush()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    frame_input.close()
+    pipeline.close()
+    metrics = pipeline.metrics
+
+    settings = DISPLAY_SETTINGS[name]
+    return {
+        "driver": settings["driver"],
+        "class": settings["class"],
+        "size": [settings["width"], settings["height"]],
+        "mode": settings.get("mode", "RGB"),
+        "target_fps": settings.get("fps"),
+        "frames": frames,
+        "pushed": metrics.pushed,
+        "unchanged": metrics.unchanged,
+        "init_s": round(init_s, 3),
+        "fps": round(metrics.pushed / wall, 2),
+        "cpu_ms_per_frame": round(cpu / frames * 1000, 3),
+        "cpu_percent": round(cpu / wall * 100, 1),
+        "bus_ms_per_frame": round((_fakesim.bus_time - bus_start) / frames * 1000, 3),
+        "stages": {stage: summarize(metrics.stages[stage]) for stage in STAGES},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", help="comma separated DISPLAY_SETTINGS names (default: all)")
+    parser.add_argument("--frames", type=int, default=60, help="frames per LCD/OLED profile")
+    parser.add_argument("--epd-frames", type=int, default=5, help="frames per e-paper profile")
+    parser.add_argument("--source", default="480x320", help="source image size, WxH")
+    parser.add_argument("--epd-scale", type=float, default=_fakesim.EPD_SCALE,
+                        help="fraction of real e-paper refresh time to simulate")
+    parser.add_argument("--output", help="write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    _fakesim.EPD_SCALE = args.epd_scale
+    source_size = tuple(int(v) for v in args.source.split("x"))
+    profiles = args.profiles.split(",") if args.profiles else list(DISPLAY_SETTINGS)
+
+    results = {}
+    print(f"{'profile':24} {'fps':>8} {'cpu ms':>8} {'bus ms':>8} " + " ".join(f"{s:>10}" for s in STAGES))
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in profiles:
+            epd = DISPLAY_SETTINGS[name]["driver"] == "waveshare_epd"
+            result = run_profile(name, args.epd_frames if epd else args.frames, source_size, workdir)
+            results[name] = result
+            stages = " ".join(f"{result['stages'][s]['mean_ms']:10.3f}" for s in STAGES)
+            print(f"{name:24} {result['fps']:8.2f} {result['cpu_ms_per_frame']:8.3f} "
+                  f"{result['bus_ms_per_frame']:8.3f} {stages}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "python": sys.version.split()[0],
+                "source": list(source_size),
+                "epd_scale": args.epd_scale,
+                "profiles": results,
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
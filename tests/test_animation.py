@@ -0,0 +1,50 @@
+from threading import Event, Timer
+from DCore.inputs import AnimationInput
+
+WIDTH, HEIGHT = 4, 2
+
+
+def make_raw(tmp_path, count):
+    path = tmp_path / "frames.raw"
+    path.write_bytes(b"".join(bytes((value,)) * WIDTH * HEIGHT for value in range(count)))
+    return {"path": str(path), "width": WIDTH, "height": HEIGHT, "mode": "L", "fps": 4}
+
+
+def test_frames_play_in_order(tmp_path):
+    animation = AnimationInput("animation", make_raw(tmp_path, 3) | {"loop": False})
+    stop = Event()
+    values = []
+    try:
+        version = None
+        for _ in range(3):
+            assert animation.wait_for_change(version, stop)
+            version = animation.version
+            values.append(animation.frame.getpixel((0, 0)))
+    finally:
+        animation.close()
+    assert values == [0, 1, 2]
+
+
+def test_wait_for_change_sleeps_until_frames_are_due(tmp_path):
+    animation = AnimationInput("animation", make_raw(tmp_path, 8))
+    polls = []
+    original = animation.poll
+    animation.poll = lambda: polls.append(1) or original()
+    stop = Event()
+    try:
+        assert animation.wait_for_change(None, stop)
+        version = animation.version
+        polls.clear()
+        # 4 fps: the next frame is due after 0.25 s.
+        assert animation.wait_for_change(version, stop)
+        # One poll per poll_timeout (at least 5 ms), not a busy loop.
+        assert len(polls) < 60
+        stop_timer = Timer(0.1, stop.set)
+        stop_timer.start()
+        version = animation.version
+        polls.clear()
+        assert not animation.wait_for_change(version, stop)
+        stop_timer.join()
+        assert len(polls) < 30
+    finally:
+        animation.close()
@@ -0,0 +1,105 @@
+import struct
+import time
+from threading import Event, Timer
+import pytest
+from DCore.inputs import FramebufferInput
+
+WIDTH, HEIGHT = 16, 8
+
+
+def pixel_bytes(bpp, red_offset, rgb):
+    red, green, blue = rgb
+    if bpp == 32:
+        return bytes((red, green, blue, 0)) if red_offset == 0 else bytes((blue, green, red, 0))
+    if bpp == 24:
+        return bytes((red, green, blue)) if red_offset == 0 else bytes((blue, green, red))
+    if bpp == 16:
+        return struct.pack("<H", (red >> 3) << 11 | (green >> 2) << 5 | blue >> 3)
+    return bytes((red,))
+
+
+def make_device(tmp_path, bpp, red_offset, rgb, stride=None):
+    """A regular file standing in for /dev/fbN, filled with one color."""
+    stride = stride or WIDTH * bpp // 8
+    row = pixel_bytes(bpp, red_offset, rgb) * WIDTH
+    path = tmp_path / "fb"
+    path.write_bytes((row + bytes(stride - len(row))) * HEIGHT)
+    config = {"path": str(path), "width": WIDTH, "height": HEIGHT, "bpp": bpp,
+              "stride": stride, "red_offset": red_offset, "sample_step": 4}
+    return path, config
+
+
+@pytest.mark.parametrize("bpp, red_offset, expected", [
+    (32, 16, (200, 100, 48)),
+    (32, 0, (200, 100, 48, 0)),
+    (24, 16, (200, 100, 48)),
+    (24, 0, (200, 100, 48)),
+    (16, 11, (200, 100, 48)),
+    (8, 0, 200),
+])
+def test_pixel_formats(tmp_path, bpp, red_offset, expected):
+    _, config = make_device(tmp_path, bpp, red_offset, (200, 100, 48))
+    fb = FramebufferInput("fb", config)
+    try:
+        assert fb.poll()
+        assert fb.frame.size == (WIDTH, HEIGHT)
+        pixel = fb.frame.getpixel((WIDTH - 1, HEIGHT - 1))
+        if bpp == 16:
+            # RGB565 drops the low bits of every channel.
+            assert all(abs(a - b) < 8 for a, b in zip(pixel, expected))
+        else:
+            assert pixel == expected
+    finally:
+        fb.close()
+
+
+def test_padded_stride(tmp_path):
+    _, config = make_device(tmp_path, 32, 16, (1, 2, 3), stride=WIDTH * 4 + 64)
+    fb = FramebufferInput("fb", config)
+    try:
+        assert fb.poll()
+        assert fb.frame.getpixel((WIDTH - 1, HEIGHT - 1)) == (1, 2, 3)
+    finally:
+        fb.close()
+
+
+def test_checksum_detects_changes_within_sample_step(tmp_path):
+    path, config = make_device(tmp_path, 32, 0, (10, 10, 10))
+    fb = FramebufferInput("fb", config)
+    try:
+        assert fb.poll()
+        first = fb.frame
+        assert not any(fb.poll() for _ in range(config["sample_step"]))
+        # Change one pixel of the last row, through the file like a console would.
+        with open(path, "r+b") as file:
+            file.seek((HEIGHT - 1) * WIDTH * 4)
+            file.write(bytes((250, 0, 0, 0)))
+        assert any(fb.poll() for _ in range(config["sample_step"]))
+        assert fb.frame.getpixel((0, HEIGHT - 1)) == (250, 0, 0, 0)
+        # Published frames are snapshots, not views of the live mapping.
+        assert first.getpixel((0, HEIGHT - 1)) == (10, 10, 10, 0)
+    finally:
+        fb.close()
+
+
+def test_wait_for_change_sleeps_between_polls(tmp_path):
+    _, config = make_device(tmp_path, 8, 0, (0, 0, 0))
+    config["poll_interval"] = 0.05
+    fb = FramebufferInput("fb", config)
+    polls = []
+    original = fb.poll
+    fb.poll = lambda: polls.append(1) or original()
+    stop = Event()
+    try:
+        assert fb.wait_for_change(None, stop)
+        version = fb.version
+        start = time.monotonic()
+        stop_timer = Timer(0.3, stop.set)
+        stop_timer.start()
+        assert not fb.wait_for_change(version, stop)
+        stop_timer.join()
+        assert time.monotonic() - start >= 0.25
+        # About one poll per poll_interval, not a busy loop.
+        assert len(polls) < 20
+    finally:
+        fb.close()
@@ -0,0 +1,49 @@
+import time
+from PIL import Image
+from DCore.metrics import MetricsExporter, ScreenMetrics, render_prometheus
+from DCore.pipeline import ScreenPipeline
+from DCore.virtual import VirtualDisplay
+
+
+def test_frame_bytes_of_a_virtual_screen():
+    display = VirtualDisplay(40, 30)
+    pipeline = ScreenPipeline("preview", {"double_buffer": False}, {"width": 40, "height": 30, "mode": "RGB"},
+                              display)
+    pipeline.push(Image.new("RGB", (40, 30), "red"))
+    # One RGB frame, held by PIL at 4 bytes per pixel.
+    assert pipeline.metrics.frame_bytes == 40 * 30 * 4
+    pipeline.push(Image.new("L", (40, 30)))
+    assert pipeline.metrics.frame_bytes == 40 * 30
+    assert pipeline.metrics.frame_peak_bytes == 40 * 30 * 4
+
+
+def test_render_prometheus_lists_every_screen():
+    metrics = ScreenMetrics("preview")
+    metrics.frame_bytes = 123
+    text = render_prometheus([metrics], {"preview": {"achieved_fps": 5.0, "loop_fps": 9.0}})
+    assert 'dcore_frame_bytes{screen="preview"} 123' in text
+    assert 'dcore_fps{screen="preview"} 5.0' in text
+    assert 'dcore_loop_fps{screen="preview"} 9.0' in text
+
+
+def test_exporter_survives_a_failing_render(tmp_path):
+    calls = []
+
+    def render():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("dictionary changed size during iteration")
+        return "dcore_up 1\n"
+
+    path = tmp_path / "metrics.prom"
+    exporter = MetricsExporter(render, str(path), None, 0.01)
+    exporter.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert path.read_text() == "dcore_up 1\n"
+        assert exporter.is_alive()
+    finally:
+        exporter.stop()
+        exporter.join()
@@ -0,0 +1,66 @@
+import pytest
+from PIL import Image
+from DCore.pipeline import ScreenPipeline
+
+SETTINGS = {"width": 8, "height": 4, "mode": "RGB"}
+
+
+class ili9486:
+    """Records what the pipeline sends to a luma ili9486, which has no set_window."""
+
+    def __init__(self):
+        self.size = (8, 4)
+        self.commands = []
+        self.writes = []
+
+    def command(self, cmd, *args):
+        self.commands.append((cmd,) + args)
+
+    def data(self, data):
+        self.writes.append(bytes(data))
+
+    def display(self, image):
+        self.writes.append(image.tobytes())
+
+
+class st7789(ili9486):
+    def set_window(self, x1, y1, x2, y2):
+        self.commands.append(("window", x1, y1, x2, y2))
+
+
+def pipeline(display, **screen_config):
+    return ScreenPipeline("lcd", dict(screen_config, double_buffer=False), SETTINGS, display)
+
+
+@pytest.mark.parametrize("screen_config, colmod", [
+    ({"pixel_format": "rgb565"}, 0x55),
+    ({"pixel_format": "rgb666"}, 0x06),
+    ({"pixel_format": "rgb565", "fast_pack": False}, 0x06),
+])
+def test_colmod_follows_the_pixel_format(screen_config, colmod):
+    display = st7789()
+    pipeline(display, **screen_config)
+    assert display.commands == [(0x3A, colmod)]
+
+
+def test_reload_on_the_same_driver_resets_colmod():
+    display = st7789()
+    pipeline(display, pixel_format="rgb565")
+    screen = pipeline(display, pixel_format="rgb666")
+    assert display.commands[-1] == (0x3A, 0x06)
+    screen.push(Image.new("RGB", (8, 4), "red"))
+    assert display.writes == [bytes((255, 0, 0)) * 32]
+
+
+
+def test_ili9486_window_uses_padded_commands():
+    display = ili9486()
+    screen = pipeline(display, pixel_format="rgb565")
+    screen.push(Image.new("RGB", (8, 4), "white"))
+    assert display.commands == [
+        (0x3A, 0, 0x55),
+        (0x2A, 0, 0, 0, 0, 0, 0, 0, 7),
+        (0x2B, 0, 0, 0, 0, 0, 0, 0, 3),
+        (0x2C,),
+    ]
+    assert display.writes == [b"\xff\xff" * 32]
@@ -0,0 +1,78 @@
+import yaml
+from PIL import Image
+from DCore.__main__ import DisplayManager
+
+
+def write_config(path, tmp_path, source, **screen):
+    config = {
+        "screens": {"preview": dict({"name": "virtual", "default_input": "input1",
+                                     "width": 32, "height": 24}, **screen)},
+        "frame_inputs": {"input1": {"type": "retrieved", "path": str(tmp_path / source), "watch": "poll"}},
+        "logging": {"file": str(tmp_path / "dcore.log")},
+        "metrics": {"enabled": False},
+    }
+    path.write_text(yaml.safe_dump(config))
+
+
+def shown(manager):
+    manager.pipelines["preview"].flush()
+    return manager.screens["preview"].last_frame.getpixel((0, 0))
+
+
+def close(manager):
+    for pipeline in manager.pipelines.values():
+        pipeline.close()
+    for frame_input in manager.inputs.values():
+        frame_input.close()
+
+
+def test_reload_shows_the_recreated_input(tmp_path):
+    Image.new("RGB", (64, 48), "red").save(tmp_path / "a.png")
+    Image.new("RGB", (64, 48), "blue").save(tmp_path / "b.png")
+    config_path = tmp_path / "config.yaml"
+    write_config(config_path, tmp_path, "a.png")
+    manager = DisplayManager(str(config_path))
+    try:
+        assert manager.update_screen("preview")
+        assert shown(manager) == (255, 0, 0)
+        write_config(config_path, tmp_path, "b.png")
+        assert manager.reload_config()
+        # The new input starts over at version 1, like the old one did.
+        assert manager.update_screen("preview")
+        assert shown(manager) == (0, 0, 255)
+    finally:
+        close(manager)
+
+
+def test_invalid_reload_keeps_the_running_screen(tmp_path):
+    Image.new("RGB", (64, 48), "red").save(tmp_path / "a.png")
+    config_path = tmp_path / "config.yaml"
+    write_config(config_path, tmp_path, "a.png")
+    manager = DisplayManager(str(config_path))
+    try:
+        display = manager.screens["preview"]
+        write_config(config_path, tmp_path, "a.png", dither="bogus")
+        assert not manager.reload_config()
+        assert manager.screens["preview"] is display
+        assert manager.update_screen("preview")
+        assert shown(manager) == (255, 0, 0)
+    finally:
+        close(manager)
+
+
+def test_virtual_shm_screens_get_a_ring_each(tmp_path):
+    Image.new("RGB", (64, 48), "red").save(tmp_path / "a.png")
+    config_path = tmp_path / "config.yaml"
+    write_config(config_path, tmp_path, "a.png", output="shm")
+    config = yaml.safe_load(config_path.read_text())
+    config["screens"]["second"] = dict(config["screens"]["preview"])
+    config_path.write_text(yaml.safe_dump(config))
+    manager = DisplayManager(str(config_path))
+    try:
+        first, second = manager.screens["preview"], manager.screens["second"]
+        assert first._ring.shm.name != second._ring.shm.name
+        assert first._ring.owner and second._ring.owner
+    finally:
+        close(manager)
+        for display in manager.screens.values():
+            display.cleanup()
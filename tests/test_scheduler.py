@@ -0,0 +1,23 @@
+from DCore.scheduler import FrameScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_achieved_fps_counts_pushed_frames_only():
+    clock = FakeClock()
+    scheduler = FrameScheduler(16, clock)
+    # 16 loop iterations per second, every fourth one pushes a frame.
+    for index in range(17):
+        scheduler.frame_done(pushed=index % 4 == 0)
+        clock.now += 0.0625
+    stats = scheduler.stats()
+    assert stats["achieved_fps"] == 4.0
+    assert stats["loop_fps"] == 16.0
+    assert stats["frames"] == 17
+    assert stats["pushed"] == 5
@@ -0,0 +1,22 @@
+import os
+import pytest
+from PIL import Image
+from DCore.client import FrameProducer
+from DCore.inputs import ReceivedInput
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA", "I;16"])
+def test_producer_sends_in_the_ring_mode(mode):
+    received = ReceivedInput("input3", {"shm_name": f"dcore_test_{os.getpid()}", "width": 32, "height": 32,
+                                        "mode": mode})
+    producer = FrameProducer(received.shm_name)
+    try:
+        assert producer.mode == mode
+        image = Image.new("RGB", (32, 32), (200, 100, 50))
+        producer.send(image)
+        assert received.poll()
+        assert received.frame.mode == mode
+        assert received.frame.tobytes() == image.convert(mode).tobytes()
+    finally:
+        producer.close()
+        received.close()
@@ -0,0 +1,62 @@
+import random
+import pytest
+from PIL import Image
+from DCore.tricolor import split_tricolor, DEFAULT_THRESHOLDS
+
+
+def reference_tricolor(image, thresholds=DEFAULT_THRESHOLDS):
+    """The per-pixel loop split_tricolor replaced."""
+    low, high = thresholds
+    grayscale = image.convert('L')
+    img_bw = Image.new('1', image.size, color=255)
+    bw_pixels = img_bw.load()
+    img_rw = Image.new('RGB', image.size, color=(255, 255, 255))
+    rw_pixels = img_rw.load()
+    for y in range(image.size[1]):
+        for x in range(image.size[0]):
+            gray_pixel = grayscale.getpixel((x, y))
+            if low <= gray_pixel <= high:
+                rw_pixels[x, y] = 0
+                bw_pixels[x, y] = 255
+            elif gray_pixel < low:
+                bw_pixels[x, y] = 0
+            else:
+                bw_pixels[x, y] = 255
+    return img_bw, img_rw
+
+
+def random_image(mode, size=(61, 37), seed=0):
+    rng = random.Random(seed)
+    bands = len(Image.new(mode, (1, 1)).getbands())
+    image = Image.frombytes(mode, size, bytes(rng.randrange(256) for _ in range(size[0] * size[1] * bands)))
+    if mode == "P":
+        image.putpalette([rng.randrange(256) for _ in range(768)])
+    return image
+
+
+def gradient():
+    image = Image.new("L", (256, 2))
+    image.putdata(list(range(256)) * 2)
+    return image
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA", "P"])
+@pytest.mark.parametrize("thresholds", [DEFAULT_THRESHOLDS, (0, 255), (100, 100), (200, 40)])
+def test_split_tricolor_matches_loop(mode, thresholds):
+    image = random_image(mode)
+    img_bw, img_rw = split_tricolor(image, thresholds)
+    ref_bw, ref_rw = reference_tricolor(image, thresholds)
+    assert img_bw.mode == "1" and img_rw.mode == "RGB"
+    assert img_bw.tobytes() == ref_bw.tobytes()
+    assert img_rw.tobytes() == ref_rw.tobytes()
+
+
+def test_split_tricolor_gradient_boundaries():
+    img_bw, img_rw = split_tricolor(gradient())
+    ref_bw, ref_rw = reference_tricolor(gradient())
+    assert img_bw.tobytes() == ref_bw.tobytes()
+    assert img_rw.tobytes() == ref_rw.tobytes()
+    # 84 is black, 85 and 170 are red, 171 is white.
+    assert [img_bw.getpixel((g, 0)) for g in (84, 85, 170, 171)] == [0, 255, 255, 255]
+    assert [img_rw.getpixel((g, 0)) for g in (84, 85, 170, 171)] == [
+        (255, 255, 255), (0, 0, 0), (0, 0, 0), (255, 255, 255)]
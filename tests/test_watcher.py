@@ -0,0 +1,84 @@
+import subprocess
+import sys
+from threading import Event
+import pytest
+from DCore.watcher import InotifyWatcher, PollingWatcher
+
+WRITE = "open(sys.argv[1], 'wb').write(b'frame')"
+RENAME = "open(sys.argv[1] + '.tmp', 'wb').write(b'frame'); os.replace(sys.argv[1] + '.tmp', sys.argv[1])"
+
+
+def writer(code, path):
+    """Write path from another process, as a frame producer would."""
+    subprocess.run([sys.executable, "-c", f"import os, sys; {code}", str(path)], check=True)
+
+
+@pytest.fixture
+def inotify():
+    try:
+        watcher = InotifyWatcher()
+    except (OSError, AttributeError):
+        pytest.skip("inotify is not available")
+    yield watcher
+    watcher.close()
+
+
+@pytest.mark.parametrize("code", [WRITE, RENAME], ids=["close_write", "moved_to"])
+def test_inotify_wakes_on_finished_writes(tmp_path, inotify, code):
+    path = tmp_path / "frame.png"
+    woken = Event()
+    inotify.watch(str(path), woken.set)
+    writer(code, path)
+    assert woken.wait(2)
+
+
+def test_inotify_ignores_neighbouring_files(tmp_path, inotify):
+    woken = Event()
+    inotify.watch(str(tmp_path / "frame.png"), woken.set)
+    writer(WRITE, tmp_path / "other.png")
+    assert not woken.wait(0.3)
+
+
+def test_inotify_unwatch(tmp_path, inotify):
+    path = tmp_path / "frame.png"
+    woken = Event()
+    inotify.unwatch(inotify.watch(str(path), woken.set))
+    writer(WRITE, path)
+    assert not woken.wait(0.3)
+
+
+def test_polling_fallback_wakes_on_changes(tmp_path):
+    path = tmp_path / "frame.png"
+    path.write_bytes(b"first")
+    watcher = PollingWatcher(0.01)
+    woken = Event()
+    try:
+        watcher.watch(str(path), woken.set)
+        assert not woken.wait(0.1)
+        writer(RENAME, path)
+        assert woken.wait(2)
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("backend", ["inotify", "polling"])
+def test_failing_callback_keeps_watching(tmp_path, inotify, backend):
+    watcher = inotify if backend == "inotify" else PollingWatcher(0.01)
+    path = tmp_path / "frame.png"
+    path.write_bytes(b"first")
+    woken = Event()
+
+    def broken():
+        raise RuntimeError("callback failed")
+
+    try:
+        watcher.watch(str(path), broken)
+        watcher.watch(str(path), woken.set)
+        writer(RENAME, path)
+        assert woken.wait(2)
+        woken.clear()
+        writer(WRITE, path)
+        assert woken.wait(2)
+    finally:
+        if watcher is not inotify:
+            watcher.close()
@@ -0,0 +1,55 @@
+import time
+from threading import Event
+from DCore.worker import ScreenWorker
+
+
+class Manager:
+    """Stands in for DisplayManager: frames arrive only when changed is set."""
+
+    def __init__(self):
+        self.changed = Event()
+        self.updates = 0
+
+    def update_screen(self, screen_name):
+        self.updates += 1
+        pushed = self.changed.is_set()
+        self.changed.clear()
+        return pushed
+
+    def wait_for_input(self, screen_name, stop_event):
+        while not stop_event.is_set():
+            if self.changed.wait(0.01):
+                return True
+        return False
+
+
+def run_worker(manager, on_change, seconds):
+    worker = ScreenWorker(manager, "screen", 60, on_change)
+    worker.start()
+    time.sleep(seconds)
+    worker.stop()
+    worker.join()
+    return worker
+
+
+def test_idle_fps_pacing_sleeps_on_the_input():
+    manager = Manager()
+    manager.changed.set()
+    run_worker(manager, False, 0.3)
+    # One pass pushing the frame, one finding nothing new, then sleep.
+    assert manager.updates == 2
+
+
+def test_fps_pacing_wakes_on_changes():
+    manager = Manager()
+    worker = ScreenWorker(manager, "screen", 60)
+    worker.start()
+    try:
+        time.sleep(0.1)
+        manager.changed.set()
+        time.sleep(0.1)
+        assert not manager.changed.is_set()
+        assert worker.scheduler.pushed == 1
+    finally:
+        worker.stop()
+        worker.join()